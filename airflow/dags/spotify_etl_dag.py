@@ -8,6 +8,7 @@ This DAG performs the following steps:
 5. Merge the transformed Spotify and Grammy datasets using the EtlGrammySpotifyMerge class.
 6. Infer the schema and create seed data for the merged dataset using the CreateSchemaSeed class.
 7. Create a table in PostgreSQL and insert the seed data.
+8. Refresh the reporting aggregate tables using the ReportingAggregates class.
 Tasks:
 - load_spotify_dataset: Load Spotify dataset from PostgreSQL.
 - load_grammy_dataset: Load Grammy dataset from PostgreSQL.
@@ -16,33 +17,112 @@ Tasks:
 - merge_datasets: Merge Spotify and Grammy datasets.
 - infer_schema_and_seed: Infer schema and create seed data for the merged dataset.
 - create_table_and_insert_data: Create table in PostgreSQL and insert seed data.
+- refresh_reporting_aggregates: Refresh the aggregate tables used by the dashboards.
 Dependencies:
-- load_spotify_dataset >> transform_spotify_data >> merge_datasets >> infer_schema_and_seed >> create_table_and_insert_data
-- load_grammy_dataset >> transform_grammy_data >> merge_datasets >> infer_schema_and_seed >> create_table_and_insert_data
+- load_spotify_dataset >> transform_spotify_data >> merge_datasets >> infer_schema_and_seed >> create_table_and_insert_data >> refresh_reporting_aggregates
+- load_grammy_dataset >> transform_grammy_data >> merge_datasets >> infer_schema_and_seed >> create_table_and_insert_data >> refresh_reporting_aggregates
+ETL engines:
+- The ETL_ENGINE environment variable selects how the transformations run: 'pandas' (default) loads the staging
+  rows and transforms them in Python; 'sql' compiles each transformation into a single query executed inside
+  PostgreSQL (EtlSpotifySql / EtlGrammySql), so the load tasks skip reading the staging tables; 'auto' picks
+  'sql' for staging tables with at least ETL_SQL_ENGINE_MIN_ROWS rows (default 50000) and 'pandas' otherwise.
+  The sharded Spotify transform only runs the pandas engine, so 'sql' and 'auto' are rejected when
+  SPOTIFY_TRANSFORM_SHARDING is set.
+Query metrics:
+- Each task exports the duration, rows and bytes of its database statements as JSON under QUERY_METRICS_DIR
+  (default 'logs/query_metrics'). Statements slower than QUERY_SLOW_MS (default 1000) are appended to
+  slow_queries.jsonl, with the EXPLAIN (ANALYZE, BUFFERS) plan of slow SELECT queries when QUERY_EXPLAIN_SLOW is 'true'.
+Sharded Spotify transform:
+- When the SPOTIFY_TRANSFORM_SHARDING environment variable is 'genre' or 'hash', the Spotify branch becomes
+  list_spotify_shards >> transform_spotify_shard (one mapped task instance per shard) >> transform_spotify_data,
+  where each shard reads its own rows from spotify_staging and transform_spotify_data performs the global
+  'track_id' de-duplication. SPOTIFY_TRANSFORM_SHARD_COUNT sets the number of shards for 'hash' (default 8).
+Near-duplicate recordings:
+- When SPOTIFY_NEAR_DUPLICATES is 'true', the Spotify transform clusters the recordings listed under several
+  'track_id's (MinHash/LSH over the normalized artists and track name, verified by duration and audio features),
+  gives them a 'canonical_track_id' and removes the duplicates by it, whatever the engine or sharding.
 """
 
 from airflow import DAG  # Import DAG class for workflow management
 from airflow.operators.python import PythonOperator  # Import PythonOperator to run Python functions as tasks
-from airflow.utils.dates import days_ago  # Utility for defining start dates relative to the current date
 from datetime import datetime  # For setting specific start dates
-import pandas as pd  # Import pandas for data manipulation
+from datetime import timedelta  # Utility for specifying time intervals
+from functools import lru_cache  # Cache the database service once it is created
 import sys  # System-specific parameters and functions
 import os  # For interacting with the operating system
-from datetime import timedelta  # Utility for specifying time intervals
 
-# Add 'src' directory to the Python path to enable module imports for ETL classes
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
-from etl_spotify import EtlSpotifyAirflow
-from etl_grammy import EtlGrammyAirflow
-from etl_grammy_spotify_merge import EtlGrammySpotifyMerge
+# The scheduler parses this file every few seconds, so only light modules are imported here.
+# pandas, the ETL classes and the database client are imported or created inside the task callables.
+
+# Add the 'src' directories to the Python path to enable module imports for ETL classes and connections
+"""
+    Adds 'airflow/src' (ETL classes) and 'src' (database connection and utilities) to the Python path.
+    Called by the task callables right before importing those modules.
+"""
+def add_project_paths():
+    dags_dir = os.path.dirname(os.path.abspath(__file__))
+    for path in (os.path.join(dags_dir, '..', 'src'), os.path.join(dags_dir, '..', '..', 'src')):
+        path = os.path.abspath(path)
+        if path not in sys.path:
+            sys.path.append(path)
+
+# Initialize PostgreSQL database connection service on first use
+"""
+    Creates the PostgreSQL database connection service the first time a task needs it.
+
+    Returns:
+        PostgreSQLConnection: The shared database connection service.
+"""
+@lru_cache(maxsize=None)
+def get_db_service():
+    add_project_paths()
+    from connections.db import PostgreSQLConnection
+    return PostgreSQLConnection(
+        slow_query_ms=float(os.getenv('QUERY_SLOW_MS', '1000')),
+        slow_log_path=os.path.join(query_metrics_dir, 'slow_queries.jsonl'),
+        explain_slow_queries=os.getenv('QUERY_EXPLAIN_SLOW', 'false').lower() == 'true'
+    )
 
-# Add 'connections' directory to the Python path for database connection modules
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'src')))
-from connections.db import PostgreSQLConnection
-from utils.create_schema_seed import CreateSchemaSeed
+# Export the query metrics of the finished task
+"""
+    Task callback that exports the statement metrics recorded by the database service during the task
+    as JSON, to '<QUERY_METRICS_DIR>/<run_id>/<task_id>[_<map_index>].json', and resets them.
 
-# Initialize PostgreSQL database connection service
-db_service = PostgreSQLConnection()
+    Args:
+        context (dict): Airflow task context.
+"""
+def export_task_query_metrics(context):
+    if get_db_service.cache_info().currsize == 0:
+        return  # The task did not use the database
+    ti = context['ti']
+    map_index = getattr(ti, 'map_index', -1)
+    file_name = f"{ti.task_id}_{map_index}.json" if map_index is not None and map_index >= 0 else f"{ti.task_id}.json"
+    run_dir = str(context['run_id']).replace(':', '_').replace('+', '_')
+    print(get_db_service().export_query_metrics(os.path.join(query_metrics_dir, run_dir, file_name)))
+    get_db_service().query_metrics.reset()
+
+# Directory where the per-task query metrics and the slow-query log are written
+query_metrics_dir = os.getenv('QUERY_METRICS_DIR', 'logs/query_metrics')
+
+# Sharding strategy of the Spotify transform: 'none', 'genre' or 'hash'
+spotify_sharding = os.getenv('SPOTIFY_TRANSFORM_SHARDING', 'none').lower()
+spotify_shard_count = int(os.getenv('SPOTIFY_TRANSFORM_SHARD_COUNT', '8'))
+if spotify_sharding not in ('none', 'genre', 'hash'):
+    raise ValueError(f"Invalid SPOTIFY_TRANSFORM_SHARDING value: {spotify_sharding}")
+if spotify_shard_count < 1:
+    raise ValueError(f"Invalid SPOTIFY_TRANSFORM_SHARD_COUNT value: {spotify_shard_count}; it must be at least 1.")
+
+# Cluster near-duplicate Spotify recordings and de-duplicate them by 'canonical_track_id'
+spotify_near_duplicates = os.getenv('SPOTIFY_NEAR_DUPLICATES', 'false').lower() == 'true'
+
+# ETL engine: 'pandas', 'sql' or 'auto' (chosen per dataset from its size)
+etl_engine = os.getenv('ETL_ENGINE', 'pandas').lower()
+etl_sql_engine_min_rows = int(os.getenv('ETL_SQL_ENGINE_MIN_ROWS', '50000'))
+if etl_engine not in ('pandas', 'sql', 'auto'):
+    raise ValueError(f"Invalid ETL_ENGINE value: {etl_engine}")
+# The mapped shards always run the pandas engine, so the SQL engine could not apply to the Spotify branch
+if spotify_sharding != 'none' and etl_engine != 'pandas':
+    raise ValueError(f"ETL_ENGINE={etl_engine} cannot be combined with SPOTIFY_TRANSFORM_SHARDING={spotify_sharding}; use ETL_ENGINE=pandas or disable sharding.")
 
 # Function to get the full path of an SQL file for running queries
 """
@@ -58,6 +138,244 @@ def get_sql_query_path(filename):
     current_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(current_dir, '../../sql/queries', filename)
 
+# Choose the ETL engine of a dataset
+"""
+    Chooses the engine used to transform a staging table, counting its rows when ETL_ENGINE is 'auto'.
+
+    Args:
+        table_name (str): Name of the staging table.
+
+    Returns:
+        str: 'pandas' or 'sql'.
+"""
+def choose_etl_engine(table_name):
+    if etl_engine != 'auto':
+        return etl_engine
+    rows = get_db_service().run_select_query(get_db_service().open_query(get_sql_query_path('count_rows.sql'), table_name))
+    if isinstance(rows, str):
+        raise Exception(rows)
+    engine = 'sql' if rows[0][0] >= etl_sql_engine_min_rows else 'pandas'
+    print(f"{table_name} has {rows[0][0]} rows, using the {engine} engine.")
+    return engine
+
+# Load Spotify dataset into XCom
+"""
+    Loads the Spotify dataset from the PostgreSQL database into a DataFrame and pushes it to XCom.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom.
+
+    Returns:
+        pd.DataFrame: DataFrame containing Spotify data, or None when the SQL engine transforms it in the database.
+"""
+def load_spotify_dataset(**kwargs):
+    engine = choose_etl_engine('spotify_staging')
+    kwargs['ti'].xcom_push(key='etl_engine', value=engine)  # Share the engine with the transformation task
+    if engine == 'sql':
+        return None  # The SQL engine reads the staging table inside PostgreSQL
+    df = get_db_service().create_dataframe(query_path=get_sql_query_path('select_all_rows.sql'), table_name='spotify_staging')
+    kwargs['ti'].xcom_push(key='spotify_data', value=df)  # Send DataFrame to XCom
+    return df
+
+# Load Grammy dataset into XCom
+"""
+    Loads the Grammy dataset from the PostgreSQL database into a DataFrame and pushes it to XCom.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom.
+
+    Returns:
+        pd.DataFrame: DataFrame containing Grammy data, or None when the SQL engine transforms it in the database.
+"""
+def load_grammy_dataset(**kwargs):
+    engine = choose_etl_engine('grammy_staging')
+    kwargs['ti'].xcom_push(key='etl_engine', value=engine)  # Share the engine with the transformation task
+    if engine == 'sql':
+        return None  # The SQL engine reads the staging table inside PostgreSQL
+    df = get_db_service().create_dataframe(query_path=get_sql_query_path('select_all_rows.sql'), table_name='grammy_staging')
+    kwargs['ti'].xcom_push(key='grammy_data', value=df)  # Send DataFrame to XCom
+    return df
+
+# Run Spotify ETL process using XCom data
+"""
+    Initializes the ETL process for Spotify data using the DataFrame pulled from XCom,
+    or runs it inside PostgreSQL when the load task selected the SQL engine.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom.
+"""
+def run_etl_spotify_with_data(**kwargs):
+    add_project_paths()
+    from etl_spotify import EtlSpotifyAirflow
+    from normalization_dictionary import NormalizationDictionary
+    normalization_dictionary = NormalizationDictionary(db_service=get_db_service())  # Reuse strings normalized in previous runs
+    if kwargs['ti'].xcom_pull(task_ids='load_spotify_dataset', key='etl_engine') == 'sql':
+        from etl_sql_pushdown import EtlSpotifySql
+        df_clean = EtlSpotifySql(db_service=get_db_service(), normalization_dictionary=normalization_dictionary).run_etl()
+        if spotify_near_duplicates:
+            df_clean = EtlSpotifyAirflow(data=df_clean, near_duplicate_clustering=True).run_reduce()  # Cluster the SQL output
+        kwargs['ti'].xcom_push(key='spotify_clean', value=df_clean)  # Store transformed data in XCom
+        return
+    df_spotify = kwargs['ti'].xcom_pull(task_ids='load_spotify_dataset', key='spotify_data')
+    etl_spotify = EtlSpotifyAirflow(data=df_spotify, normalization_dictionary=normalization_dictionary,
+                                    near_duplicate_clustering=spotify_near_duplicates)  # Initialize ETL class with data
+    df_clean = etl_spotify.run_etl()  # Execute ETL process
+    kwargs['ti'].xcom_push(key='spotify_clean', value=df_clean)  # Store transformed data in XCom
+
+# List the shards of the Spotify dataset
+"""
+    Lists the shards of spotify_staging for the mapped Spotify transform, by genre or by hash of 'track_id'.
+
+    Returns:
+        list: One dictionary of keyword arguments per shard.
+"""
+def list_spotify_shards(**kwargs):
+    if spotify_sharding == 'genre':
+        genres = get_db_service().run_select_query(get_db_service().open_query(get_sql_query_path('list_genres.sql'), 'spotify_staging'))
+        if isinstance(genres, str):
+            raise Exception(genres)
+        return [{'query_file': 'select_rows_by_genre.sql', 'params': {'track_genre': genre}} for (genre,) in genres]
+    return [
+        {'query_file': 'select_rows_by_hash_shard.sql', 'params': {'shard_count': spotify_shard_count, 'shard_index': shard_index}}
+        for shard_index in range(spotify_shard_count)
+    ]
+
+# Run Spotify ETL process on one shard
+"""
+    Loads one shard of the Spotify dataset from PostgreSQL, cleans it and removes the duplicates inside the shard.
+
+    Args:
+        query_file (str): Name of the SQL file selecting the rows of the shard.
+        params (dict): Query parameters identifying the shard.
+        **kwargs: Contextual arguments for task, including XCom.
+"""
+def run_etl_spotify_shard(query_file, params, **kwargs):
+    add_project_paths()
+    from etl_spotify import EtlSpotifyAirflow
+    from normalization_dictionary import NormalizationDictionary
+    df_shard = get_db_service().create_dataframe(query_path=get_sql_query_path(query_file), table_name='spotify_staging', params=params)
+    normalization_dictionary = NormalizationDictionary(db_service=get_db_service())  # Reuse strings normalized in previous runs
+    etl_spotify = EtlSpotifyAirflow(data=df_shard, normalization_dictionary=normalization_dictionary)
+    df_clean = etl_spotify.run_shard_etl()  # Clean and de-duplicate inside the shard
+    kwargs['ti'].xcom_push(key='spotify_shard', value=df_clean)  # Store the transformed shard in XCom
+
+# Combine the transformed Spotify shards
+"""
+    Combines the transformed Spotify shards, performs the global 'track_id' de-duplication and filtering,
+    and pushes the result to XCom.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom.
+"""
+def reduce_spotify_shards(**kwargs):
+    import pandas as pd
+    add_project_paths()
+    from etl_spotify import EtlSpotifyAirflow
+    shards = kwargs['ti'].xcom_pull(task_ids='transform_spotify_shard', key='spotify_shard')
+    etl_spotify = EtlSpotifyAirflow(data=pd.concat([shard for shard in shards if shard is not None], ignore_index=True),
+                                    near_duplicate_clustering=spotify_near_duplicates)
+    df_clean = etl_spotify.run_reduce()  # Global de-duplication and filtering
+    kwargs['ti'].xcom_push(key='spotify_clean', value=df_clean)  # Store transformed data in XCom
+
+# Run Grammy ETL process using XCom data
+"""
+    Initializes the ETL process for Grammy data using the DataFrame pulled from XCom,
+    or runs it inside PostgreSQL when the load task selected the SQL engine.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom.
+"""
+def run_etl_grammy_with_data(**kwargs):
+    add_project_paths()
+    from etl_grammy import EtlGrammyAirflow
+    from normalization_dictionary import NormalizationDictionary
+    normalization_dictionary = NormalizationDictionary(db_service=get_db_service())  # Reuse strings normalized in previous runs
+    if kwargs['ti'].xcom_pull(task_ids='load_grammy_dataset', key='etl_engine') == 'sql':
+        from etl_sql_pushdown import EtlGrammySql
+        df_clean = EtlGrammySql(db_service=get_db_service(), normalization_dictionary=normalization_dictionary).run_etl()
+        kwargs['ti'].xcom_push(key='grammy_clean', value=df_clean)  # Store transformed data in XCom
+        return
+    df_grammy = kwargs['ti'].xcom_pull(task_ids='load_grammy_dataset', key='grammy_data')
+    etl_grammy = EtlGrammyAirflow(data=df_grammy, normalization_dictionary=normalization_dictionary)  # Initialize ETL class with data
+    df_clean = etl_grammy.run_etl()  # Execute ETL process
+    kwargs['ti'].xcom_push(key='grammy_clean', value=df_clean)  # Store transformed data in XCom
+
+# Merge Spotify and Grammy datasets using XCom data
+"""
+    Merges the transformed Spotify and Grammy datasets by combining DataFrames pulled from XCom.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom.
+"""
+def run_etl_grammy_spotify_merge(**kwargs):
+    add_project_paths()
+    from etl_grammy_spotify_merge import EtlGrammySpotifyMerge
+    df_grammy = kwargs['ti'].xcom_pull(task_ids='transform_grammy_data', key='grammy_clean')
+    df_spotify = kwargs['ti'].xcom_pull(task_ids='transform_spotify_data', key='spotify_clean')
+    etl_merge = EtlGrammySpotifyMerge(grammy_data=df_grammy, spotify_data=df_spotify)  # Initialize ETL merge class
+    df_combined = etl_merge.run_merge()  # Run merging process
+    kwargs['ti'].xcom_push(key='combined_data', value=df_combined)  # Store merged data in XCom
+
+# Infer schema and generate seed SQL files for the database
+"""
+    Infers the PostgreSQL schema and generates seed SQL scripts for the combined dataset, saving them and pushing their paths to XCom.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom.
+"""
+def infer_schema_and_seed(**kwargs):
+    add_project_paths()
+    from utils.create_schema_seed import CreateSchemaSeed
+    df_merge = kwargs['ti'].xcom_pull(task_ids='merge_datasets', key='combined_data')
+    schema_seed_class = CreateSchemaSeed()  # Initialize schema and seed class
+    save_path = 'sql/schema_seed_clean'
+    os.makedirs(save_path, exist_ok=True)  # Create directory if it doesn't exist
+    schema_path = os.path.join(save_path, "spotify_grammy_clean_schema.sql")
+    schema_script = schema_seed_class.infer_schema_postgres(df=df_merge, table_name='spotify_grammy_clean', file_path=schema_path)
+    seed_path = os.path.join(save_path, "spotify_grammy_clean_seed.sql")
+    seed_script = schema_seed_class.create_seed_postgres(df=df_merge, table_name='spotify_grammy_clean', file_path=seed_path)
+    for result in (schema_script, seed_script):
+        if result.startswith('✗'):
+            raise Exception(result)
+    kwargs['ti'].xcom_push(key='schema_path_clean', value=schema_path)  # Store schema script path in XCom
+    kwargs['ti'].xcom_push(key='seed_path_clean', value=seed_path)  # Store seed script path in XCom
+
+# Load data into PostgreSQL by creating tables and inserting records
+"""
+    Creates a table in PostgreSQL based on the inferred schema and inserts data using the seed script.
+    Committed batches are recorded in the load_batch_ledger table under the DAG run id, so a retry keeps
+    the table and resumes from the first uncommitted batch instead of reloading everything.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom and the run id.
+"""
+def load_data_to_postgres(**kwargs):
+    schema_path = kwargs['ti'].xcom_pull(task_ids='infer_schema_and_seed', key='schema_path_clean')
+    seed_path = kwargs['ti'].xcom_pull(task_ids='infer_schema_and_seed', key='seed_path_clean')
+    run_id = kwargs['run_id']
+    db_service = get_db_service()
+    if db_service.committed_batches(seed_path, run_id):
+        print(f"Resuming the load of {seed_path} for run {run_id}.")
+    else:
+        # First attempt of this run: recreate the table from the inferred schema
+        db_service.run_query(query='DROP TABLE IF EXISTS "spotify_grammy_clean";\n' + db_service.open_query(schema_path))
+    db_service.insert_data_from_sql(seed_path, run_id=run_id)  # Insert records into table
+
+# Refresh the reporting aggregates after loading the clean table
+"""
+    Refreshes the pre-aggregated reporting tables from spotify_grammy_clean, recomputing only the genres
+    and years whose rows changed since the previous refresh.
+
+    Args:
+        **kwargs: Contextual arguments for task, including XCom.
+"""
+def refresh_reporting_aggregates(**kwargs):
+    add_project_paths()
+    from reporting_aggregates import ReportingAggregates
+    df_merge = kwargs['ti'].xcom_pull(task_ids='merge_datasets', key='combined_data')
+    reporting_aggregates = ReportingAggregates(db_service=get_db_service(), source_table='spotify_grammy_clean')
+    print(reporting_aggregates.run_refresh(df_merge))
+
 # Define default arguments for the DAG
 default_args = {
     'owner': 'airflow',  # Owner of the DAG
@@ -66,6 +384,8 @@ default_args = {
     'email_on_retry': False,  # Don't send emails on retry
     'retries': 1,  # Number of retries on failure
     'retry_delay': timedelta(minutes=5),  # Delay between retries
+    'on_success_callback': export_task_query_metrics,  # Export the database metrics of each task
+    'on_failure_callback': export_task_query_metrics,
 }
 
 # Define DAG with schedule and parameters
@@ -78,107 +398,6 @@ with DAG(
     catchup=False,  # Don't catch up past runs
 ) as dag:
 
-    # Load Spotify dataset into XCom
-    """
-        Loads the Spotify dataset from the PostgreSQL database into a DataFrame and pushes it to XCom.
-
-        Args:
-            **kwargs: Contextual arguments for task, including XCom.
-
-        Returns:
-            pd.DataFrame: DataFrame containing Spotify data.
-    """
-    def load_spotify_dataset(**kwargs):
-        df = db_service.create_dataframe(query_path=get_sql_query_path('select_all_rows.sql'), table_name='spotify_staging')
-        kwargs['ti'].xcom_push(key='spotify_data', value=df)  # Send DataFrame to XCom
-        return df
-
-    # Load Grammy dataset into XCom
-    """
-        Loads the Grammy dataset from the PostgreSQL database into a DataFrame and pushes it to XCom.
-
-        Args:
-            **kwargs: Contextual arguments for task, including XCom.
-
-        Returns:
-            pd.DataFrame: DataFrame containing Grammy data.
-    """
-    def load_grammy_dataset(**kwargs):
-        
-        df = db_service.create_dataframe(query_path=get_sql_query_path('select_all_rows.sql'), table_name='grammy_staging')
-        kwargs['ti'].xcom_push(key='grammy_data', value=df)  # Send DataFrame to XCom
-        return df
-
-    # Run Spotify ETL process using XCom data
-    """
-        Initializes the ETL process for Spotify data using the DataFrame pulled from XCom.
-
-        Args:
-            **kwargs: Contextual arguments for task, including XCom.
-    """
-    def run_etl_spotify_with_data(**kwargs):
-        df_spotify = kwargs['ti'].xcom_pull(task_ids='load_spotify_dataset', key='spotify_data')
-        etl_spotify = EtlSpotifyAirflow(data=df_spotify)  # Initialize ETL class with data
-        etl_spotify.run_etl()  # Execute ETL process
-
-    # Run Grammy ETL process using XCom data
-    """
-        Initializes the ETL process for Grammy data using the DataFrame pulled from XCom.
-
-        Args:
-            **kwargs: Contextual arguments for task, including XCom.
-    """
-    def run_etl_grammy_with_data(**kwargs):
-        df_grammy = kwargs['ti'].xcom_pull(task_ids='load_grammy_dataset', key='grammy_data')
-        etl_grammy = EtlGrammyAirflow(data=df_grammy)  # Initialize ETL class with data
-        etl_grammy.run_etl()  # Execute ETL process
-
-    # Merge Spotify and Grammy datasets using XCom data
-    """
-        Merges the Spotify and Grammy datasets by combining DataFrames pulled from XCom.
-
-        Args:
-            **kwargs: Contextual arguments for task, including XCom.
-    """
-    def run_etl_grammy_spotify_merge(**kwargs):
-        df_grammy = kwargs['ti'].xcom_pull(task_ids='load_grammy_dataset', key='grammy_data')
-        df_spotify = kwargs['ti'].xcom_pull(task_ids='load_spotify_dataset', key='spotify_data')
-        etl_merge = EtlGrammySpotifyMerge(grammy_data=df_grammy, spotify_data=df_spotify)  # Initialize ETL merge class
-        df_combined = etl_merge.run_merge()  # Run merging process
-        kwargs['ti'].xcom_push(key='combined_data', value=df_combined)  # Store merged data in XCom
-
-    # Infer schema and generate seed SQL files for the database
-    """
-        Infers the PostgreSQL schema and generates seed SQL scripts for the combined dataset, saving the results and pushing them to XCom.
-
-        Args:
-            **kwargs: Contextual arguments for task, including XCom.
-    """
-    def infer_schema_and_seed(**kwargs):
-        df_merge = kwargs['ti'].xcom_pull(task_ids='merge_datasets', key='combined_data')
-        schema_seed_class = CreateSchemaSeed()  # Initialize schema and seed class
-        save_path = 'sql/schema_seed_clean'
-        os.makedirs(save_path, exist_ok=True)  # Create directory if it doesn't exist
-        schema_path = os.path.join(save_path, "spotify_grammy_clean_schema.sql")
-        schema_script = schema_seed_class.infer_schema_postgres(df=df_merge, table_name='spotify_grammy_clean', file_path=schema_path)
-        seed_path = os.path.join(save_path, "spotify_grammy_clean_seed.sql")
-        seed_script = schema_seed_class.create_seed_postgres(df=df_merge, table_name='spotify_grammy_clean', file_path=seed_path)
-        kwargs['ti'].xcom_push(key='schema_data_clean', value=schema_script)  # Store schema script in XCom
-        kwargs['ti'].xcom_push(key='seed_data_clean', value=seed_script)  # Store seed script in XCom
-
-    # Load data into PostgreSQL by creating tables and inserting records
-    """
-        Creates a table in PostgreSQL based on the inferred schema and inserts data using the seed script.
-
-        Args:
-            **kwargs: Contextual arguments for task, including XCom.
-    """
-    def load_data_to_postgres(**kwargs):
-        schema_script = kwargs['ti'].xcom_pull(task_ids='infer_schema_and_seed', key='schema_data_clean')
-        seed_script = kwargs['ti'].xcom_pull(task_ids='infer_schema_and_seed', key='seed_data_clean')
-        db_service.run_query(query=schema_script)  # Create table in PostgreSQL
-        db_service.insert_data_from_sql(sql_script=seed_script)  # Insert records into table
-    
     # Define tasks to load datasets, transform data, merge datasets, infer schema, and load data into PostgreSQL
     
     #Load Spotify dataset
@@ -188,10 +407,11 @@ with DAG(
         then pushes it to XCom for downstream tasks.
         task_id: load_spotify_dataset
     """
-    load_dataset_spotify = PythonOperator(
-        task_id='load_spotify_dataset',
-        python_callable=load_spotify_dataset,
-        provide_context=True)
+    if spotify_sharding == 'none':
+        load_dataset_spotify = PythonOperator(
+            task_id='load_spotify_dataset',
+            python_callable=load_spotify_dataset,
+            provide_context=True)
 
     #Load Grammy dataset
     """
@@ -213,15 +433,31 @@ with DAG(
 
         Executes `run_etl_spotify_with_data`, which initializes and runs the ETL process 
         for Spotify data using the `EtlSpotifyAirflow` class, pulling data from XCom.
+        When sharding is enabled, it executes `reduce_spotify_shards` instead, which combines
+        the shards transformed by the mapped `transform_spotify_shard` task instances.
 
         task_id: transform_spotify_data
     """
-    transform_spotify = PythonOperator(
-        task_id='transform_spotify_data',
-        python_callable=run_etl_spotify_with_data,
-        provide_context=True  
-        
-    )
+    if spotify_sharding == 'none':
+        transform_spotify = PythonOperator(
+            task_id='transform_spotify_data',
+            python_callable=run_etl_spotify_with_data,
+            provide_context=True  
+            
+        )
+    else:
+        list_shards_spotify = PythonOperator(
+            task_id='list_spotify_shards',
+            python_callable=list_spotify_shards
+        )
+        transform_spotify_shards = PythonOperator.partial(
+            task_id='transform_spotify_shard',
+            python_callable=run_etl_spotify_shard
+        ).expand(op_kwargs=list_shards_spotify.output)
+        transform_spotify = PythonOperator(
+            task_id='transform_spotify_data',
+            python_callable=reduce_spotify_shards
+        )
 
     # Transformation task for Grammy
     """
@@ -285,6 +521,24 @@ with DAG(
         provide_context=True
     )
 
+    # Task to refresh the reporting aggregates
+    """
+        Task to refresh the reporting aggregate tables.
+
+        Executes `refresh_reporting_aggregates`, which updates the summary tables read by the
+        dashboards, only for the genres and years changed by the load.
+
+        task_id: refresh_reporting_aggregates
+    """
+    refresh_aggregates = PythonOperator(
+        task_id='refresh_reporting_aggregates',
+        python_callable=refresh_reporting_aggregates,
+        provide_context=True
+    )
+
     # Define task dependencies
-    load_dataset_spotify >> transform_spotify >> merge_datasets >> infer_schema_seed >> create_table_insert_data
-    load_dataset_grammy >> transform_grammy >> merge_datasets >> infer_schema_seed >> create_table_insert_data
+    if spotify_sharding == 'none':
+        load_dataset_spotify >> transform_spotify >> merge_datasets >> infer_schema_seed >> create_table_insert_data >> refresh_aggregates
+    else:
+        list_shards_spotify >> transform_spotify_shards >> transform_spotify >> merge_datasets >> infer_schema_seed >> create_table_insert_data >> refresh_aggregates
+    load_dataset_grammy >> transform_grammy >> merge_datasets >> infer_schema_seed >> create_table_insert_data >> refresh_aggregates
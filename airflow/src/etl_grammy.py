@@ -1,6 +1,6 @@
 import pandas as pd
 import re
-from unidecode import unidecode
+from normalization_dictionary import normalize_value
 
 class EtlGrammyAirflow:
     # Initializes the EtlGrammyAirflow class with Grammy dataset.
@@ -9,9 +9,12 @@ class EtlGrammyAirflow:
         
         Args:
             data (DataFrame): The Grammy data as a pandas DataFrame.
+            normalization_dictionary (NormalizationDictionary): Persistent dictionary used to reuse
+                previously normalized strings. Default is None (normalize every value).
     """
-    def __init__(self, data):
+    def __init__(self, data, normalization_dictionary=None):
         self.grammy_data = data
+        self.normalization_dictionary = normalization_dictionary
 
     # Simplifies the Grammy award title in the 'title' column.
     """
@@ -82,13 +85,14 @@ class EtlGrammyAirflow:
     """
     def clean_columns(self):
         def clean_column(column):
-            column = column.fillna('').str.strip().str.lower()
-            column = column.apply(unidecode)
-            column[column == ''] = None
-            return column
+            # Same rule as the normalization dictionary, so both paths produce identical values
+            return column.map(normalize_value).astype(object)
 
         columns_to_clean = ['category', 'artist', 'nominee']
-        self.grammy_data[columns_to_clean] = self.grammy_data[columns_to_clean].apply(clean_column)
+        if self.normalization_dictionary is not None:
+            self.grammy_data[columns_to_clean] = self.normalization_dictionary.normalize_frame(self.grammy_data[columns_to_clean])
+        else:
+            self.grammy_data[columns_to_clean] = self.grammy_data[columns_to_clean].apply(clean_column)
         return self.grammy_data
 
     # Filters categories based on specific keywords.
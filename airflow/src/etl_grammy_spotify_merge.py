@@ -1,5 +1,7 @@
 import pandas as pd
+import numpy as np
 import os
+from string_encoding import SharedStringEncoder
 
 class EtlGrammySpotifyMerge:
     # Function that initializes the EtlGrammySpotifyMerge class with Grammy and Spotify data, setting the save path.
@@ -15,23 +17,139 @@ class EtlGrammySpotifyMerge:
         self.grammy_data = grammy_data
         self.spotify_data = spotify_data
         self.save_path = save_path
+        self.encoder = SharedStringEncoder()
+        self.encoded = False
+        self.artist_bridge = None
+
+    # Function that dictionary-encodes the string join columns of both datasets into a shared code space.
+    """
+        Replaces the Grammy 'artist' and 'nominee' columns and the Spotify 'artists', 'album_name' and
+        'track_name' columns with int32 codes from a single shared vocabulary, and builds the artist bridge
+        table with the same codes. Joins and de-duplication then run on integers; `decode_strings`
+        restores the strings for output.
+
+        Returns:
+            tuple: (encoded Grammy DataFrame, encoded Spotify DataFrame).
+    """
+    def encode_strings(self):
+        if self.encoded:
+            return self.grammy_data, self.spotify_data
+
+        # Identical source rows are collapsed first, so row positions identify the content of the merged rows
+        self.grammy_data = self.grammy_data.drop_duplicates().reset_index(drop=True)
+        self.spotify_data = self.spotify_data.drop_duplicates().reset_index(drop=True)
+
+        # Individual credited artists share the code space so they can be compared with the Grammy artist
+        artist_tokens = self.spotify_data['artists'].str.split(';').explode().str.strip()
+        artist_tokens = artist_tokens[artist_tokens.notna() & (artist_tokens != '')]
+
+        grammy_columns = ['artist', 'nominee']
+        spotify_columns = ['artists', 'album_name', 'track_name']
+        codes = self.encoder.fit_transform(
+            [self.grammy_data[column] for column in grammy_columns]
+            + [self.spotify_data[column] for column in spotify_columns]
+            + [artist_tokens]
+        )
+
+        self.grammy_data = self.grammy_data.assign(**dict(zip(grammy_columns, codes[:2])))
+        self.spotify_data = self.spotify_data.assign(**dict(zip(spotify_columns, codes[2:5])))
+        self.build_artist_bridge(artist_tokens.index.to_numpy(dtype='int64'), codes[5])
+        self.encoded = True
+
+        print(f"Encoded join columns with a shared vocabulary of {len(self.encoder.vocabulary)} strings.")
+        return self.grammy_data, self.spotify_data
+
+    # Function that decodes the dictionary-encoded columns of a DataFrame back to strings.
+    """
+        Decodes the columns encoded by `encode_strings` back to strings.
+
+        Args:
+            data (DataFrame): DataFrame with encoded columns.
+
+        Returns:
+            DataFrame: A copy of the DataFrame with the original string values.
+    """
+    def decode_strings(self, data):
+        if not self.encoded:
+            return data
+        encoded_columns = [column for column in ['artist', 'nominee', 'artists', 'album_name', 'track_name'] if column in data.columns]
+        return data.assign(**{column: self.encoder.inverse_transform(data[column]) for column in encoded_columns})
+
+    # Function that stores the Spotify 'artists' lists as an integer-keyed artist bridge table.
+    """
+        Builds the artist bridge table, with one row per credited artist of each track.
+
+        Args:
+            track_idx (ndarray): Position in the Spotify data of the track crediting each artist.
+            artist_ids (ndarray): Shared code of each credited artist.
+
+        Returns:
+            DataFrame: Bridge table with the columns 'track_idx' and 'artist_id'.
+    """
+    def build_artist_bridge(self, track_idx, artist_ids):
+        self.artist_bridge = pd.DataFrame({
+            'track_idx': track_idx,
+            'artist_id': artist_ids
+        }).drop_duplicates()
+
+        print(f"Artist bridge built: {self.artist_bridge.shape[0]} track-artist pairs, {self.artist_bridge['artist_id'].nunique()} artists.")
+        return self.artist_bridge
+
+    # Function that matches Grammy nominees with Spotify tracks credited to the nominated artist.
+    """
+        Matches Grammy records with Spotify records whose credited artists include the Grammy artist
+        and whose value in `spotify_column` equals the Grammy nominee. Each Grammy record and track
+        pair appears once, however many times the artist is credited. The data is encoded first if needed,
+        and the result keeps the encoded columns, plus the 'grammy_idx' and 'track_idx' positions of the
+        source rows (-1 when absent).
+
+        Args:
+            spotify_column (str): Spotify column compared with the Grammy 'nominee' column.
+
+        Returns:
+            DataFrame: Outer-join-like DataFrame with the '_merge' indicator column.
+    """
+    def match_on_artists(self, spotify_column):
+        grammy_data, spotify_data = self.encode_strings()
+
+        # Hash join on the integer artist and title codes
+        grammy_keys = pd.DataFrame({
+            'grammy_idx': np.arange(len(grammy_data)),
+            'artist_id': grammy_data['artist'].to_numpy(),
+            'title': grammy_data['nominee'].to_numpy()
+        })
+        grammy_keys = grammy_keys[(grammy_keys['artist_id'] >= 0) & (grammy_keys['title'] >= 0)]
+        track_keys = self.artist_bridge.assign(title=spotify_data[spotify_column].to_numpy()[self.artist_bridge['track_idx'].to_numpy()])
+        pairs = grammy_keys.merge(track_keys, on=['artist_id', 'title'], how='inner')[['grammy_idx', 'track_idx']].drop_duplicates()
+
+        matched = pd.concat([
+            grammy_data.iloc[pairs['grammy_idx'].to_numpy()].reset_index(drop=True),
+            spotify_data.iloc[pairs['track_idx'].to_numpy()].reset_index(drop=True)
+        ], axis=1)
+        left_only = grammy_data.drop(index=pairs['grammy_idx'].unique())
+        right_only = spotify_data.drop(index=pairs['track_idx'].unique())
+
+        merged_data = pd.concat([matched, left_only, right_only], ignore_index=True)
+        merged_data = merged_data[list(grammy_data.columns) + list(spotify_data.columns)]
+        # Source row positions (-1 when absent), which identify each merged row for de-duplication
+        merged_data['grammy_idx'] = np.concatenate([pairs['grammy_idx'].to_numpy(), left_only.index.to_numpy(), np.full(len(right_only), -1)]).astype('int64')
+        merged_data['track_idx'] = np.concatenate([pairs['track_idx'].to_numpy(), np.full(len(left_only), -1), right_only.index.to_numpy()]).astype('int64')
+        merged_data['_merge'] = pd.Categorical(
+            ['both'] * len(matched) + ['left_only'] * len(left_only) + ['right_only'] * len(right_only),
+            categories=['left_only', 'right_only', 'both']
+        )
+        return merged_data
 
     # Function that merges Grammy and Spotify album data based on partial matches.
     """
-        Merges Grammy and Spotify data based on partial matches in album names and artists.
+        Merges Grammy and Spotify data based on matches in album names and any credited artist.
 
         Returns:
             tuple: (DataFrame with all matched records, DataFrame with Spotify-only records for albums).
     """
     def merge_albums(self):
-        merged_data_albums = pd.merge(
-            self.grammy_data,
-            self.spotify_data,
-            how='outer',  # Keep all records from both datasets
-            left_on=['artist', 'nominee'],  # Grammy DataFrame columns
-            right_on=['artists', 'album_name'],  # Spotify DataFrame columns
-            indicator=True  # Indicator to show the origin of each row
-        )
+        # Keep all records from both datasets, matching the nominee with the album name
+        merged_data_albums = self.match_on_artists('album_name')
 
         # Add 'grammy_nomination' column to indicate Grammy nominations in album matches
         merged_data_albums['grammy_nomination'] = merged_data_albums['_merge'] == 'both'
@@ -44,20 +162,14 @@ class EtlGrammySpotifyMerge:
 
     # Function that merges Grammy and Spotify song data based on song title matches.
     """
-        Merges Grammy and Spotify data based on matches in songs.
+        Merges Grammy and Spotify data based on matches in song names and any credited artist.
 
         Returns:
             tuple: (DataFrame with all matched records, DataFrame with Spotify-only records for songs).
     """
     def merge_songs(self):
-        merged_data_songs = pd.merge(
-            self.grammy_data,
-            self.spotify_data,
-            how='outer',  # Keep all records from both datasets
-            left_on=['artist', 'nominee'],  # Grammy DataFrame columns
-            right_on=['artists', 'track_name'],  # Spotify DataFrame columns
-            indicator=True  # Indicator to show the origin of each row
-        )
+        # Keep all records from both datasets, matching the nominee with the track name
+        merged_data_songs = self.match_on_artists('track_name')
 
         # Add 'grammy_nomination' column to indicate Grammy nominations in song matches
         merged_data_songs['grammy_nomination'] = merged_data_songs['_merge'] == 'both'
@@ -70,7 +182,11 @@ class EtlGrammySpotifyMerge:
 
     # Function that combines merged album and song data, removing duplicates.
     """
-        Combines the album and song DataFrames, removing any duplicate records.
+        Combines the album and song DataFrames, removing any duplicate records. Since `encode_strings`
+        collapses identical source rows, a merged row is identified by the positions of its source rows,
+        its '_merge' indicator and its 'grammy_nomination' flag, so
+        duplicates are detected on integers without hashing the string columns; the position columns are
+        dropped afterwards.
 
         Args:
             merged_data_albums (DataFrame): DataFrame containing merged album data.
@@ -82,7 +198,8 @@ class EtlGrammySpotifyMerge:
     def combine_data(self, merged_data_albums, merged_data_songs):
         
         combined_data = pd.concat([merged_data_albums, merged_data_songs], ignore_index=True)
-        combined_data = combined_data.drop_duplicates()
+        combined_data = combined_data.drop_duplicates(subset=['grammy_idx', 'track_idx', '_merge', 'grammy_nomination'])
+        combined_data = combined_data.drop(columns=['grammy_idx', 'track_idx'])
 
         print(f"Total number of records in the combined DataFrame: {combined_data.shape[0]}")
 
@@ -113,6 +230,9 @@ class EtlGrammySpotifyMerge:
             DataFrame: The final combined DataFrame with Grammy nominations indicated.
     """
     def run_merge(self):
+        # Encode the string join columns into a shared int32 code space
+        self.encode_strings()
+
         # Perform album merging
         merged_data_albums, only_spotify_albums = self.merge_albums()
 
@@ -122,6 +242,9 @@ class EtlGrammySpotifyMerge:
         # Combine the results
         combined_data = self.combine_data(merged_data_albums, merged_data_songs)
 
+        # Decode the join columns back to strings for the output
+        combined_data = self.decode_strings(combined_data)
+
         # Save the combined data to an Excel file
         self.save_combined_data(combined_data)
 
@@ -1,16 +1,22 @@
 # src/etl_spotify.py
 import pandas as pd
-from unidecode import unidecode
+from normalization_dictionary import normalize_value
 
 class EtlSpotifyAirflow:
-    def __init__(self, data):
+    def __init__(self, data, normalization_dictionary=None, near_duplicate_clustering=False):
         """
         Initializes the EtlSpotifyAirflow class with Spotify dataset.
 
         Args:
             data (DataFrame): The Spotify data as a pandas DataFrame.
+            normalization_dictionary (NormalizationDictionary): Persistent dictionary used to reuse
+                previously normalized strings. Default is None (normalize every value).
+            near_duplicate_clustering (bool): Whether to cluster the recordings listed under several
+                'track_id's and remove duplicates by 'canonical_track_id'. Default is False.
         """
         self.spotify_data = data
+        self.normalization_dictionary = normalization_dictionary
+        self.near_duplicate_clustering = near_duplicate_clustering
     
     # Attempt to clean the specified column by filling NaNs, stripping whitespace, and converting to lowercase
     """
@@ -25,10 +31,8 @@ class EtlSpotifyAirflow:
     def clean_column(self, column):
 
         try:
-            cleaned_column = column.fillna('').str.strip().str.lower()
-            cleaned_column = cleaned_column.apply(unidecode)
-            cleaned_column[cleaned_column == ''] = None
-            return cleaned_column
+            # Same rule as the normalization dictionary, so both paths produce identical values
+            return column.map(normalize_value).astype(object)
         except Exception as e:
             print(f"An error occurred: {e}")
             return False
@@ -44,15 +48,37 @@ class EtlSpotifyAirflow:
 
         try:
             # Apply cleaning only to the specified columns
-            self.spotify_data[columns_to_clean] = self.spotify_data[columns_to_clean].apply(self.clean_column)
+            if self.normalization_dictionary is not None:
+                self.spotify_data[columns_to_clean] = self.normalization_dictionary.normalize_frame(self.spotify_data[columns_to_clean])
+            else:
+                self.spotify_data[columns_to_clean] = self.spotify_data[columns_to_clean].apply(self.clean_column)
             return self.spotify_data
         except Exception as e:
             print(f"An error occurred: {e}")
             return False
         
+    # Assign the canonical 'track_id' of each cluster of near-duplicate tracks
+    """
+        Clusters the tracks listed several times under different 'track_id's, albums or genres and adds
+        the 'canonical_track_id' column: the 'track_id' of the first listed track of each cluster.
+
+        Returns:
+            DataFrame: The DataFrame with the 'canonical_track_id' column.
+    """
+    def assign_canonical_track_ids(self):
+        from etl_spotify_near_duplicates import SpotifyNearDuplicates
+        try:
+            self.spotify_data = self.spotify_data.assign(canonical_track_id=SpotifyNearDuplicates().canonical_track_ids(self.spotify_data))
+            return self.spotify_data
+        except Exception as e:
+            print(f"An error occurred during near-duplicate clustering: {e}")
+            return False
+
     # Remove duplicates based on the 'track_id' column while keeping the specified duplicates
     """
-        Removes duplicates from a DataFrame based on a specific column.
+        Removes duplicates from a DataFrame based on a specific column: 'canonical_track_id' when the
+        near-duplicate clusters were assigned, 'track_id' otherwise. The 'canonical_track_id' column is
+        dropped once the duplicates are removed.
 
         Args:
             keep (str): Determines which duplicates to keep. Options are 'first', 'last', or False.
@@ -62,7 +88,10 @@ class EtlSpotifyAirflow:
     """
     def remove_duplicates(self, keep='first'):
         try:
-            self.spotify_data.drop_duplicates(subset="track_id", keep=keep, inplace=True)
+            subset = "canonical_track_id" if "canonical_track_id" in self.spotify_data.columns else "track_id"
+            self.spotify_data.drop_duplicates(subset=subset, keep=keep, inplace=True)
+            if subset == "canonical_track_id":
+                self.spotify_data = self.spotify_data.drop(columns=subset)
             return self.spotify_data
         except Exception as e:
             print(f"An error occurred: {e}")
@@ -88,7 +117,9 @@ class EtlSpotifyAirflow:
         
     # Executes the complete ETL process including cleaning, deduplication, and filtering
     """
-        Executes the complete ETL process with cleaning, deduplication, and filtering.
+        Executes the complete ETL process with cleaning, deduplication, and filtering. With
+        `near_duplicate_clustering`, the records are filtered first, so each cluster is represented by
+        one of its valid tracks, and duplicates are removed by 'canonical_track_id'.
 
         Returns:
             DataFrame: The cleaned and filtered Spotify data.
@@ -97,8 +128,55 @@ class EtlSpotifyAirflow:
         
         # Clean predefined columns
         self.spotify_data = self.clean_columns()
+        # Cluster near-duplicate recordings among the valid ones and remove duplicates by cluster
+        if self.near_duplicate_clustering:
+            self.filter_time_signature()
+            self.spotify_data = self.assign_canonical_track_ids()
+            self.spotify_data = self.remove_duplicates()
+            return self.spotify_data
         # Remove duplicates in the 'track_id' column
-        self.spotify_data = self.remove_duplicates('track_id')
+        self.spotify_data = self.remove_duplicates()
+        # Filter by time_signature greater than 0
+        self.filter_time_signature()
+        return self.spotify_data
+
+    # Executes the part of the ETL process that can run on a single shard of the dataset
+    """
+        Executes the cleaning and a shard-local deduplication on one shard of the Spotify data.
+        The global deduplication and filtering are left to `run_reduce`, so that sharded and
+        single-task runs return the same records.
+
+        Returns:
+            DataFrame: The cleaned shard, with duplicates inside the shard removed.
+    """
+    def run_shard_etl(self):
+        # Clean predefined columns
+        self.spotify_data = self.clean_columns()
+        # Remove duplicates in the 'track_id' column inside the shard
+        self.spotify_data = self.remove_duplicates()
+        return self.spotify_data
+
+    # Combines the shards produced by `run_shard_etl` and completes the ETL process
+    """
+        Completes the ETL process on the concatenated shards: restores the original row order,
+        removes the 'track_id' duplicates found across shards, and filters by time signature. With
+        `near_duplicate_clustering`, the records are filtered before the near-duplicates are removed.
+
+        Returns:
+            DataFrame: The cleaned and filtered Spotify data.
+    """
+    def run_reduce(self):
+        # Restore the staging order so the first occurrence of each track is kept, as in `run_etl`
+        if 'Unnamed: 0' in self.spotify_data.columns:
+            self.spotify_data = self.spotify_data.sort_values('Unnamed: 0', kind='stable').reset_index(drop=True)
+        # Cluster near-duplicate recordings among the valid ones across shards and remove duplicates by cluster
+        if self.near_duplicate_clustering:
+            self.filter_time_signature()
+            self.spotify_data = self.assign_canonical_track_ids()
+            self.spotify_data = self.remove_duplicates()
+            return self.spotify_data
+        # Remove duplicates in the 'track_id' column across shards
+        self.spotify_data = self.remove_duplicates()
         # Filter by time_signature greater than 0
         self.filter_time_signature()
         return self.spotify_data
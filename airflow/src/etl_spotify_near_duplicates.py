@@ -0,0 +1,257 @@
+import re
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+# Audio features compared when verifying that two tracks are the same recording
+FEATURE_COLUMNS = ['danceability', 'energy', 'valence', 'acousticness', 'speechiness', 'instrumentalness']
+
+class SpotifyNearDuplicates:
+    # Initializes the SpotifyNearDuplicates class with the MinHash, LSH and tolerance parameters.
+    """
+        Initializes the SpotifyNearDuplicates class, which clusters tracks listed several times under different
+        'track_id's, albums or genres.
+
+        Tracks are first grouped by the text of their normalized '(artists, track_name)' key: each key is turned
+        into character shingles, summarized by a MinHash signature, and keys sharing a band of their signature
+        (locality-sensitive hashing) become candidate pairs. Candidates whose estimated Jaccard similarity reaches
+        `similarity_threshold` are joined with a union-find. Inside each text group, tracks are then split
+        wherever their duration or audio features differ by more than the tolerances, so that e.g. a live version
+        is not merged with the studio recording. Every stage is linear in the number of tracks, apart from
+        sorting.
+
+        Args:
+            num_perm (int): Number of MinHash permutations. Default is 64.
+            bands (int): Number of LSH bands; `num_perm` must be a multiple of it. Default is 16, which makes
+                keys with a Jaccard similarity around 0.5 candidates half of the time.
+            shingle_size (int): Length of the character shingles, at most 8. Default is 4.
+            similarity_threshold (float): Minimum estimated Jaccard similarity of two keys. Default is 0.8.
+            duration_tolerance_ms (int): Maximum duration difference inside a cluster. Default is 3000.
+            feature_tolerance (float): Maximum difference of each audio feature inside a cluster. Default is 0.05.
+            max_key_length (int): Number of characters of each key used for the shingles. Default is 96.
+            max_bucket_neighbors (int): In large LSH buckets, each key is only paired with this many following
+                keys, which bounds the number of candidate pairs. Default is 8.
+            seed (int): Seed of the hash functions, so clusters are reproducible. Default is 42.
+    """
+    def __init__(self, num_perm=64, bands=16, shingle_size=4, similarity_threshold=0.8, duration_tolerance_ms=3000,
+                 feature_tolerance=0.05, max_key_length=96, max_bucket_neighbors=8, seed=42):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        if not 1 <= shingle_size <= 8:
+            raise ValueError(f"shingle_size must be between 1 and 8, got {shingle_size}.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.similarity_threshold = similarity_threshold
+        self.duration_tolerance_ms = duration_tolerance_ms
+        self.feature_tolerance = feature_tolerance
+        self.max_key_length = max_key_length
+        self.max_bucket_neighbors = max_bucket_neighbors
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash functions h(x) = (a * x + b) mod 2^64 >> 32, with odd multipliers
+        self.hash_a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.hash_b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.band_weights = rng.integers(1, 1 << 63, size=num_perm // bands, dtype=np.uint64) | np.uint64(1)
+
+    # Builds the normalized '(artists, track_name)' key of each track.
+    """
+        Builds the text compared between tracks: the sorted artist names and the track name, transliterated
+        to ASCII, lowercased, with punctuation collapsed to single spaces.
+
+        Args:
+            data (DataFrame): Spotify data with the 'artists' and 'track_name' columns.
+
+        Returns:
+            Series: One key per track (empty for tracks without artists and name).
+    """
+    def track_keys(self, data):
+        def normalize(value):
+            return re.sub(r'[^a-z0-9]+', ' ', unidecode(str(value)).lower()).strip()
+
+        def normalize_artists(value):
+            return ' '.join(sorted(normalize(artist) for artist in str(value).split(';')))
+
+        artists = data['artists'].fillna('').astype(str)
+        track_names = data['track_name'].fillna('').astype(str)
+        # Normalize each distinct value once; catalogs repeat artists and track names many times
+        artist_keys = artists.map({value: normalize_artists(value) for value in artists.unique()})
+        name_keys = track_names.map({value: normalize(value) for value in track_names.unique()})
+        return (artist_keys + ' | ' + name_keys).str.strip(' |')
+
+    # Computes the shingle ids of each key as a padded matrix.
+    """
+        Packs the bytes of every character shingle of each key into an integer id.
+
+        Args:
+            keys (ndarray): Distinct keys.
+
+        Returns:
+            tuple: (uint64 matrix of shingle ids, one row per key, boolean matrix of valid shingles).
+    """
+    def shingle_ids(self, keys):
+        width = max(self.max_key_length, self.shingle_size)
+        encoded = np.array([key.encode('ascii', 'ignore')[:width] for key in keys], dtype=f'S{width}')
+        key_bytes = encoded.view(np.uint8).reshape(len(keys), width).astype(np.uint64)
+        lengths = np.char.str_len(encoded)
+
+        positions = width - self.shingle_size + 1
+        ids = np.zeros((len(keys), positions), dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            ids = (ids << np.uint64(8)) | key_bytes[:, offset:offset + positions]
+        # Keys shorter than a shingle keep a single (zero-padded) shingle
+        valid = np.arange(positions) < np.maximum(lengths - self.shingle_size + 1, 1)[:, None]
+        return ids, valid
+
+    # Computes the MinHash signatures of the keys.
+    """
+        Computes the MinHash signature of each key: for every multiply-shift hash function, the minimum hash
+        over the shingles of the key. Keys are processed in chunks to bound the size of the intermediate matrices.
+
+        Args:
+            keys (ndarray): Distinct keys.
+            chunk_size (int): Number of keys hashed at once. Default is 8192.
+
+        Returns:
+            ndarray: uint32 matrix of shape (len(keys), num_perm).
+    """
+    def minhash_signatures(self, keys, chunk_size=8192):
+        signatures = np.empty((len(keys), self.num_perm), dtype=np.uint32)
+        shift = np.uint64(32)
+        for start in range(0, len(keys), chunk_size):
+            ids, valid = self.shingle_ids(keys[start:start + chunk_size])
+            for perm in range(self.num_perm):
+                hashes = (ids * self.hash_a[perm] + self.hash_b[perm]) >> shift  # Wraps modulo 2^64
+                hashes[~valid] = np.iinfo(np.uint32).max
+                signatures[start:start + len(ids), perm] = hashes.min(axis=1)
+        return signatures
+
+    # Finds candidate pairs of keys sharing a band of their signature.
+    """
+        Hashes each band of the signatures and pairs the keys falling in the same bucket. Inside a bucket,
+        keys are paired with their `max_bucket_neighbors` following keys, which covers every pair of the
+        small buckets that near-duplicates produce.
+
+        Args:
+            signatures (ndarray): MinHash signatures of the keys.
+
+        Returns:
+            ndarray: int64 matrix of unique candidate pairs, shape (pairs, 2).
+    """
+    def candidate_pairs(self, signatures):
+        rows = self.num_perm // self.bands
+        pairs = []
+        for band in range(self.bands):
+            band_hash = (signatures[:, band * rows:(band + 1) * rows].astype(np.uint64) * self.band_weights).sum(axis=1, dtype=np.uint64)
+            order = np.argsort(band_hash, kind='stable')
+            sorted_hash = band_hash[order]
+            for offset in range(1, self.max_bucket_neighbors + 1):
+                same_bucket = sorted_hash[:-offset] == sorted_hash[offset:]
+                if not same_bucket.any():
+                    break
+                pairs.append(np.column_stack([order[:-offset][same_bucket], order[offset:][same_bucket]]))
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        pairs = np.sort(np.concatenate(pairs), axis=1).astype(np.int64)
+        # Deduplicate the pairs found by several bands as single int64 codes
+        codes = np.unique(pairs[:, 0] * len(signatures) + pairs[:, 1])
+        return np.column_stack([codes // len(signatures), codes % len(signatures)])
+
+    # Joins the elements of the given pairs into connected components.
+    """
+        Union-find over an array: every element repeatedly takes the smallest label of its pairs, and labels
+        are compressed by pointer jumping until nothing changes.
+
+        Args:
+            size (int): Number of elements.
+            pairs (ndarray): Pairs of element indexes to join.
+
+        Returns:
+            ndarray: Component label of each element (the smallest index of its component).
+    """
+    def connected_components(self, size, pairs):
+        labels = np.arange(size)
+        if len(pairs) == 0:
+            return labels
+        while True:
+            previous = labels.copy()
+            smallest = np.minimum(labels[pairs[:, 0]], labels[pairs[:, 1]])
+            np.minimum.at(labels, pairs[:, 0], smallest)
+            np.minimum.at(labels, pairs[:, 1], smallest)
+            np.minimum.at(labels, previous, labels)  # Propagate to the former roots
+            while True:
+                compressed = labels[labels]
+                if np.array_equal(compressed, labels):
+                    break
+                labels = compressed
+            if np.array_equal(labels, previous):
+                return labels
+
+    # Groups the tracks whose keys are near-duplicates.
+    """
+        Assigns a text group to each track: tracks with equal keys share a group, and groups of keys with an
+        estimated Jaccard similarity of at least `similarity_threshold` are merged.
+
+        Args:
+            keys (Series): Normalized key of each track.
+
+        Returns:
+            tuple: (text group of each track, tracks with an empty key being left in their own group,
+            code of the exact key of each track).
+    """
+    def text_groups(self, keys):
+        key_codes, unique_keys = pd.factorize(keys)
+        signatures = self.minhash_signatures(np.asarray(unique_keys, dtype=object))
+        pairs = self.candidate_pairs(signatures)
+        if len(pairs):
+            similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+            pairs = pairs[similarity >= self.similarity_threshold]
+        groups = self.connected_components(len(unique_keys), pairs)[key_codes]
+
+        empty_keys = (keys == '').to_numpy()
+        groups[empty_keys] = len(unique_keys) + np.flatnonzero(empty_keys)
+        print(f"Near-duplicate keys: {len(unique_keys)} distinct keys, {len(pairs)} verified candidate pairs.")
+        return groups, key_codes
+
+    # Computes the canonical 'track_id' of each track.
+    """
+        Clusters near-duplicate tracks and returns the canonical 'track_id' of each one: the id of the track
+        listed first (smallest 'Unnamed: 0', or first row) in its cluster. Inside a text group, tracks are
+        ordered by duration, once with the tracks of equal keys kept together and once across keys, and each
+        track is compared with its `max_bucket_neighbors` following tracks; pairs within the duration and
+        audio-feature tolerances (or with the same 'track_id') are joined with a union-find.
+
+        Args:
+            data (DataFrame): Spotify data with 'track_id', 'artists', 'track_name', 'duration_ms' and the
+                audio features.
+
+        Returns:
+            Series: Canonical 'track_id' of each row, aligned with `data`.
+    """
+    def canonical_track_ids(self, data):
+        if data.empty:
+            return pd.Series([], index=data.index, dtype=object, name='canonical_track_id')
+        groups, key_codes = self.text_groups(self.track_keys(data))
+        listing_order = data['Unnamed: 0'].to_numpy() if 'Unnamed: 0' in data.columns else np.arange(len(data))
+        track_codes = pd.factorize(data['track_id'])[0]
+        durations = data['duration_ms'].fillna(-1).to_numpy(dtype='float64')
+        features = [column for column in FEATURE_COLUMNS if column in data.columns]
+        feature_values = data[features].fillna(-1).to_numpy(dtype='float64')
+
+        orders = [np.lexsort((track_codes, durations, key_codes, groups)), np.lexsort((track_codes, durations, groups))]
+        pairs = []
+        for order, offset in ((order, offset) for order in orders for offset in range(1, self.max_bucket_neighbors + 1)):
+            first, second = order[:-offset], order[offset:]
+            same_track = track_codes[first] == track_codes[second]
+            close = (
+                (groups[first] == groups[second])
+                & (np.abs(durations[first] - durations[second]) <= self.duration_tolerance_ms)
+                & (np.abs(feature_values[first] - feature_values[second]) <= self.feature_tolerance).all(axis=1)
+            )
+            linked = same_track | close
+            pairs.append(np.column_stack([first[linked], second[linked]]))
+        clusters = self.connected_components(len(data), np.concatenate(pairs))
+
+        first_rows = pd.Series(listing_order).groupby(clusters).idxmin().to_numpy()
+        canonical = data['track_id'].to_numpy()[first_rows[np.unique(clusters, return_inverse=True)[1]]]
+        print(f"Near-duplicate clustering: {len(data)} tracks in {len(first_rows)} clusters.")
+        return pd.Series(canonical, index=data.index, name='canonical_track_id')
@@ -0,0 +1,336 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+# Characters removed by Python's str.strip() on the ASCII range (\x0B is the vertical tab, \x1C-\x1F the separators)
+WHITESPACE = r"E' \t\n\r\f\x0B\x1C\x1D\x1E\x1F'"
+
+# Columns returned by the staging table, in table order
+COLUMNS_QUERY = '''SELECT column_name FROM information_schema.columns
+WHERE table_schema = current_schema() AND table_name = %s
+ORDER BY ordinal_position;'''
+
+# Quotes a column name as a PostgreSQL identifier
+"""
+    Quotes a column name as a PostgreSQL identifier.
+
+    Args:
+        column (str): The column name.
+
+    Returns:
+        str: The quoted identifier.
+"""
+def quote_identifier(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+class EtlSqlPushdown(ABC):
+    # Initializes the SQL pushdown engine shared by the Spotify and Grammy pipelines.
+    """
+        Initializes the SQL pushdown engine, which compiles an ETL pipeline into a single query
+        executed inside PostgreSQL, so only the resulting rows are transferred.
+
+        Text columns are normalized by joining with the normalization dictionary table when a
+        NormalizationDictionary is given (identical results to the pandas engine, since the same
+        `unidecode` rules produced the entries), or with PostgreSQL's trim/lower/unaccent otherwise.
+
+        Args:
+            db_service (PostgreSQLConnection): Database service used to run the queries.
+            source_table (str): Name of the staging table.
+            normalization_dictionary (NormalizationDictionary): Dictionary used to normalize text columns. Default is None (use unaccent).
+    """
+    def __init__(self, db_service, source_table, normalization_dictionary=None):
+        self.db_service = db_service
+        self.source_table = source_table
+        self.normalization_dictionary = normalization_dictionary
+        self.columns = None
+
+    # Text columns cleaned by the pipeline; defined by each subclass.
+    text_columns = []
+
+    # Reads the column names of the staging table.
+    """
+        Reads the column names of the staging table in table order.
+
+        Returns:
+            list: Column names.
+    """
+    def load_columns(self):
+        if self.columns is None:
+            rows = self.db_service.run_select_query(COLUMNS_QUERY, (self.source_table,))
+            if isinstance(rows, str) or not rows:
+                raise Exception(f"✗ Could not read the columns of {self.source_table}: {rows}")
+            self.columns = [row[0] for row in rows]
+        return self.columns
+
+    # Prepares the database objects used by the normalization expressions.
+    """
+        Makes the normalization available to the query: registers the raw values of the text columns
+        missing from the normalization dictionary table, or creates the unaccent extension.
+    """
+    def prepare_normalization(self):
+        if self.normalization_dictionary is None:
+            self.db_service.run_query(query='CREATE EXTENSION IF NOT EXISTS unaccent;')
+            return
+
+        self.normalization_dictionary.ensure_table()
+        union = ' UNION '.join(
+            f'SELECT {quote_identifier(column)} AS raw_value FROM {quote_identifier(self.source_table)}'
+            for column in self.text_columns
+        )
+        rows = self.db_service.run_select_query(
+            f'''SELECT u.raw_value FROM ({union}) AS u
+WHERE u.raw_value IS NOT NULL AND NOT EXISTS (
+    SELECT 1 FROM {quote_identifier(self.normalization_dictionary.table_name)} AS d
+    WHERE d.rules_version = %(rules_version)s AND d.raw_value = u.raw_value
+);''',
+            {'rules_version': self.normalization_dictionary.version}
+        )
+        if isinstance(rows, str):
+            raise Exception(rows)
+        if rows:
+            self.normalization_dictionary.register([row[0] for row in rows])
+
+    # Returns the SQL expression normalizing a text column.
+    """
+        Builds the SQL expression returning the normalized value of a text column.
+
+        Args:
+            column (str): Column name.
+            table_alias (str): Alias of the table holding the raw column.
+
+        Returns:
+            str: SQL expression.
+    """
+    def normalize_expression(self, column, table_alias):
+        if self.normalization_dictionary is None:
+            return f"NULLIF(unaccent(lower(btrim({table_alias}.{quote_identifier(column)}, {WHITESPACE}))), '')"
+        return f"{self.dictionary_alias(column)}.normalized_value"
+
+    # Returns the alias of the dictionary join for a column.
+    def dictionary_alias(self, column):
+        return f"nd_{self.text_columns.index(column)}"
+
+    # Returns the LEFT JOIN clauses with the normalization dictionary.
+    """
+        Builds the joins with the normalization dictionary table for every text column.
+
+        Args:
+            table_alias (str): Alias of the table holding the raw columns.
+
+        Returns:
+            str: SQL join clauses, empty when normalizing with unaccent.
+    """
+    def dictionary_joins(self, table_alias):
+        if self.normalization_dictionary is None:
+            return ''
+        dictionary_table = quote_identifier(self.normalization_dictionary.table_name)
+        return '\n'.join(
+            f"LEFT JOIN {dictionary_table} AS {self.dictionary_alias(column)} "
+            f"ON {self.dictionary_alias(column)}.rules_version = %(rules_version)s "
+            f"AND {self.dictionary_alias(column)}.raw_value = {table_alias}.{quote_identifier(column)}"
+            for column in self.text_columns
+        )
+
+    # Returns the query parameters.
+    def query_params(self):
+        if self.normalization_dictionary is None:
+            return None
+        return {'rules_version': self.normalization_dictionary.version}
+
+    # Compiles the pipeline into a query; defined by each subclass.
+    @abstractmethod
+    def build_query(self):
+        pass
+
+    # Executes the pipeline inside PostgreSQL and returns the result.
+    """
+        Executes the compiled pipeline and returns the resulting rows.
+
+        Returns:
+            DataFrame: The transformed dataset.
+    """
+    def run_etl(self):
+        self.prepare_normalization()
+        df = self.db_service.create_dataframe_from_query(self.build_query(), self.query_params())
+        print("ETL process completed successfully (SQL engine).")
+        return df
+
+    # Executes the pipeline inside PostgreSQL and stores the result in a table.
+    """
+        Executes the compiled pipeline as CREATE TABLE AS, replacing the target table, without
+        transferring any row to Python.
+
+        Args:
+            target_table (str): Name of the table to create.
+
+        Returns:
+            str: Confirmation message.
+    """
+    def materialize(self, target_table):
+        self.prepare_normalization()
+        query = self.build_query().rstrip().rstrip(';')
+        return self.db_service.run_query(
+            query=f'DROP TABLE IF EXISTS {quote_identifier(target_table)};\nCREATE TABLE {quote_identifier(target_table)} AS\n{query};',
+            params=self.query_params()
+        )
+
+
+class EtlSpotifySql(EtlSqlPushdown):
+    text_columns = ['artists', 'album_name', 'track_name']
+
+    # Initializes the SQL pushdown engine of the Spotify pipeline.
+    """
+        Initializes the SQL equivalent of EtlSpotifyAirflow.run_etl.
+
+        Args:
+            db_service (PostgreSQLConnection): Database service used to run the queries.
+            source_table (str): Name of the staging table. Default is 'spotify_staging'.
+            normalization_dictionary (NormalizationDictionary): Dictionary used to normalize text columns. Default is None (use unaccent).
+            order_column (str): Column holding the original row order. Default is 'Unnamed: 0'.
+    """
+    def __init__(self, db_service, source_table='spotify_staging', normalization_dictionary=None, order_column='Unnamed: 0'):
+        super().__init__(db_service, source_table, normalization_dictionary)
+        self.order_column = order_column
+
+    # Compiles the Spotify pipeline into a single query.
+    """
+        Compiles cleaning, 'track_id' de-duplication (first occurrence in staging order) and the
+        time_signature/duration_ms filter into one query, ordered as the pandas engine output.
+
+        Returns:
+            str: SQL query.
+    """
+    def build_query(self):
+        columns = self.load_columns()
+        select_list = ',\n        '.join(
+            f"{self.normalize_expression(column, 's')} AS {quote_identifier(column)}" if column in self.text_columns
+            else f"s.{quote_identifier(column)}"
+            for column in columns
+        )
+        output_list = ', '.join(quote_identifier(column) for column in columns)
+        order_column = quote_identifier(self.order_column)
+        return f'''SELECT {output_list} FROM (
+    SELECT DISTINCT ON (s."track_id")
+        {select_list}
+    FROM {quote_identifier(self.source_table)} AS s
+    {self.dictionary_joins('s')}
+    ORDER BY s."track_id", s.{order_column}
+) AS deduplicated
+WHERE "time_signature" IS DISTINCT FROM 0 AND "duration_ms" > 0
+ORDER BY {order_column};'''
+
+
+class EtlGrammySql(EtlSqlPushdown):
+    text_columns = ['category', 'artist', 'nominee']
+    key_words = ['album', 'r&b', 'song', 'artist', 'vocal', 'performance', 'record']
+
+    # Initializes the SQL pushdown engine of the Grammy pipeline.
+    """
+        Initializes the SQL equivalent of EtlGrammyAirflow.run_etl.
+
+        Args:
+            db_service (PostgreSQLConnection): Database service used to run the queries.
+            source_table (str): Name of the staging table. Default is 'grammy_staging'.
+            normalization_dictionary (NormalizationDictionary): Dictionary used to normalize text columns. Default is None (use unaccent).
+    """
+    def __init__(self, db_service, source_table='grammy_staging', normalization_dictionary=None):
+        super().__init__(db_service, source_table, normalization_dictionary)
+
+    # Artist value before cleaning: the artist, else the name in parentheses in 'workers', else the nominee.
+    def raw_artist_expression(self):
+        return '''COALESCE(g."artist", substring(g."workers" from '\\((.*?)\\)'), g."nominee")'''
+
+    # Compiles the Grammy pipeline into a single query.
+    """
+        Compiles title simplification, winner marking (ROW_NUMBER per year and category), artist
+        extraction and filling, null artist removal, cleaning and the category keyword filter into one
+        query. Rows keep the staging order, like the pandas output.
+
+        Returns:
+            str: SQL query.
+    """
+    def build_query(self):
+        columns = self.load_columns()
+        ordinal = '''substring(g."title" from '(\\d+(?:st|nd|rd|th)) Annual GRAMMY Awards')'''
+        expressions = {
+            'title': f'''CASE WHEN {ordinal} IS NULL THEN g."title"
+            WHEN {ordinal} = '1st' THEN {ordinal} || ' GRAMMY Award'
+            ELSE {ordinal} || ' GRAMMY Awards' END''',
+            'winner': 'ROW_NUMBER() OVER (PARTITION BY g."year", g."category" ORDER BY g.row_position) = 1',
+        }
+        select_list = ',\n        '.join(
+            f"{expressions[column]} AS {quote_identifier(column)}" if column in expressions
+            else f"g.{quote_identifier(column)}"
+            for column in columns if column not in self.text_columns
+        )
+        output_list = ',\n    '.join(
+            f"{self.normalize_expression(column, 'w')} AS {quote_identifier(column)}" if column in self.text_columns
+            else f"w.{quote_identifier(column)}"
+            for column in columns
+        )
+        pattern = '|'.join(self.key_words)
+        category = self.normalize_expression('category', 'w')
+        return f'''SELECT
+    {output_list}
+FROM (
+    SELECT
+        {select_list},
+        g."category", g."nominee",
+        {self.raw_artist_expression()} AS "artist",
+        g.row_position
+    FROM (
+        SELECT *, ROW_NUMBER() OVER () AS row_position FROM {quote_identifier(self.source_table)}
+    ) AS g
+    WHERE g."year" IS NOT NULL AND g."category" IS NOT NULL
+) AS w
+{self.dictionary_joins('w')}
+WHERE w."artist" IS NOT NULL AND {category} ~* '{pattern}'
+ORDER BY w.row_position;'''
+
+
+# Compares the output of the SQL engine with the output of the pandas engine.
+"""
+    Compares the output of the SQL engine with the output of the pandas engine, row by row in output order.
+
+    Args:
+        sql_df (DataFrame): Output of the SQL engine.
+        pandas_df (DataFrame): Output of the pandas engine.
+        float_tolerance (float): Absolute tolerance for float columns. Default is 1e-9.
+
+    Returns:
+        dict: Parity report with the row counts, the columns missing on either side, the number of
+        mismatching values per column, and 'equal' set to True when both outputs match.
+"""
+def compare_engines(sql_df, pandas_df, float_tolerance=1e-9):
+    sql_df = sql_df.reset_index(drop=True)
+    pandas_df = pandas_df.reset_index(drop=True)
+    common_columns = [column for column in pandas_df.columns if column in sql_df.columns]
+    report = {
+        'rows_sql': len(sql_df),
+        'rows_pandas': len(pandas_df),
+        'missing_columns_sql': [column for column in pandas_df.columns if column not in sql_df.columns],
+        'extra_columns_sql': [column for column in sql_df.columns if column not in pandas_df.columns],
+        'mismatches': {},
+    }
+
+    if len(sql_df) == len(pandas_df):
+        for column in common_columns:
+            left, right = sql_df[column], pandas_df[column]
+            both_null = left.isna().to_numpy() & right.isna().to_numpy()
+            if pd.api.types.is_float_dtype(left) or pd.api.types.is_float_dtype(right):
+                equal = np.isclose(pd.to_numeric(left, errors='coerce'), pd.to_numeric(right, errors='coerce'), atol=float_tolerance, equal_nan=True)
+            else:
+                equal = (left.astype(object).to_numpy() == right.astype(object).to_numpy()) | both_null
+            mismatches = int((~equal).sum())
+            if mismatches:
+                report['mismatches'][column] = mismatches
+
+    report['equal'] = (
+        report['rows_sql'] == report['rows_pandas']
+        and not report['missing_columns_sql']
+        and not report['extra_columns_sql']
+        and not report['mismatches']
+    )
+    return report
@@ -0,0 +1,232 @@
+import os
+import pickle
+import tempfile
+from importlib import metadata
+
+import pandas as pd
+from unidecode import unidecode
+
+# Version of the rules implemented by `normalize_value`; bump it whenever their output changes
+RULES_VERSION = 1
+
+# Default CREATE TABLE script of the dictionary table
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'sql', 'schema_normalization_dictionary.sql')
+
+# Normalizes a single raw string; the ETL classes clean their text columns with this rule
+"""
+    Strips whitespace, converts to lowercase and removes accents from a raw value.
+
+    Args:
+        value (str): The raw value to normalize.
+
+    Returns:
+        str: The normalized value, or None if the value is null or empty after cleaning.
+"""
+def normalize_value(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    normalized = unidecode(str(value).strip().lower())
+    return normalized if normalized != '' else None
+
+# Builds the version tag of the normalization rules
+"""
+    Combines RULES_VERSION with the installed unidecode release, so that a change to the normalization
+    rules or to the transliteration tables invalidates previously stored entries.
+
+    Returns:
+        str: A tag identifying the current rules, e.g. '1:1.4.0'.
+"""
+def normalization_rules_version():
+    try:
+        unidecode_version = metadata.version('unidecode')
+    except metadata.PackageNotFoundError:
+        unidecode_version = 'unknown'
+    return f"{RULES_VERSION}:{unidecode_version}"
+
+
+class NormalizationDictionary:
+    # Initializes the dictionary with an optional database service and a local cache file.
+    """
+        Initializes the NormalizationDictionary class.
+
+        Entries map raw strings to normalized strings and are kept in a local on-disk cache and,
+        when a database service is given, in the 'normalization_dictionary' table so that they are
+        reused across DAG runs and workers.
+
+        Args:
+            db_service (PostgreSQLConnection): Database service used to read and append entries. Default is None (local cache only).
+            cache_path (str): Path of the local cache file. Default is 'data/cache/normalization_dictionary.pkl'.
+            table_name (str): Name of the dictionary table. Default is 'normalization_dictionary'.
+            schema_path (str): Path of the SQL script creating the dictionary table.
+    """
+    def __init__(self, db_service=None, cache_path='data/cache/normalization_dictionary.pkl', table_name='normalization_dictionary',
+                 schema_path=SCHEMA_PATH):
+        self.db_service = db_service
+        self.cache_path = cache_path
+        self.table_name = table_name
+        self.schema_path = schema_path
+        self.version = normalization_rules_version()
+        self.entries = self.load_cache()
+        self.table_ready = False
+
+    # Loads the local cache, discarding it if it was built with other normalization rules.
+    """
+        Loads the local cache file.
+
+        Returns:
+            dict: Cached entries for the current rules version, empty if the file is missing, unreadable or outdated.
+    """
+    def load_cache(self):
+        try:
+            with open(self.cache_path, 'rb') as file:
+                cache = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return {}
+        if cache.get('version') != self.version:
+            print("Normalization rules changed, discarding local dictionary cache.")
+            return {}
+        return cache.get('entries', {})
+
+    # Saves the local cache atomically.
+    """
+        Writes the entries to the local cache file, replacing it atomically. Each writer uses its own
+        temporary file, since concurrent transform tasks share the cache. A failed write is only reported:
+        the database table remains the source of truth.
+    """
+    def save_cache(self):
+        cache_dir = os.path.dirname(self.cache_path)
+        tmp_path = None
+        try:
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            file_descriptor, tmp_path = tempfile.mkstemp(dir=cache_dir or '.', prefix=f"{os.path.basename(self.cache_path)}.", suffix='.tmp')
+            with os.fdopen(file_descriptor, 'wb') as file:
+                pickle.dump({'version': self.version, 'entries': self.entries}, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"✗ Could not write the normalization dictionary cache: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # Creates the dictionary table if it does not exist yet.
+    """
+        Creates the dictionary table in PostgreSQL if needed.
+    """
+    def ensure_table(self):
+        if self.db_service is None or self.table_ready:
+            return
+        self.db_service.run_query(query=self.db_service.open_query(self.schema_path, self.table_name))
+        self.table_ready = True
+
+    # Fetches stored entries for the given raw values from the database.
+    """
+        Reads the entries of the current rules version for the given raw values in a single query.
+
+        Args:
+            raw_values (list): Raw values missing from the local cache.
+
+        Returns:
+            dict: Entries found in the database.
+    """
+    def fetch_entries(self, raw_values):
+        if self.db_service is None or not raw_values:
+            return {}
+        self.ensure_table()
+        rows = self.db_service.run_select_query(
+            f'SELECT "raw_value", "normalized_value" FROM "{self.table_name}" WHERE "rules_version" = %s AND "raw_value" = ANY(%s)',
+            (self.version, raw_values)
+        )
+        if isinstance(rows, str):
+            print(rows)
+            return {}
+        return dict(rows)
+
+    # Appends newly normalized entries to the database.
+    """
+        Inserts new entries for the current rules version, ignoring entries added concurrently by another run.
+
+        Args:
+            new_entries (dict): Raw values mapped to their normalized values.
+    """
+    def append_entries(self, new_entries):
+        if self.db_service is None or not new_entries:
+            return
+        self.ensure_table()
+        self.db_service.run_batch_query(
+            f'INSERT INTO "{self.table_name}" ("rules_version", "raw_value", "normalized_value") VALUES %s ON CONFLICT DO NOTHING',
+            [(self.version, raw, normalized) for raw, normalized in new_entries.items()]
+        )
+
+    # Resolves many raw values at once, normalizing only the ones never seen before.
+    """
+        Resolves the normalized form of many raw values, looking them up in the local cache first,
+        then in the database, and normalizing only the values found in neither. The new entries are
+        kept locally but not appended to the database.
+
+        Args:
+            raw_values (iterable): Unique, non-null raw values.
+
+        Returns:
+            dict: The newly normalized entries.
+    """
+    def resolve_entries(self, raw_values):
+        missing = [value for value in raw_values if value not in self.entries]
+        if not missing:
+            return {}
+
+        stored = self.fetch_entries(missing)
+        self.entries.update(stored)
+
+        new_entries = {value: normalize_value(value) for value in missing if value not in stored}
+        self.entries.update(new_entries)
+
+        self.save_cache()
+        print(f"✓ Normalization dictionary: {len(stored)} from database, {len(new_entries)} newly normalized.")
+        return new_entries
+
+    # Resolves many raw values and stores the new entries in the database.
+    """
+        Resolves the normalized form of many raw values and appends the newly normalized ones to the database.
+
+        Args:
+            raw_values (iterable): Unique, non-null raw values.
+
+        Returns:
+            dict: Raw values mapped to their normalized values.
+    """
+    def lookup(self, raw_values):
+        self.append_entries(self.resolve_entries(raw_values))
+        return self.entries
+
+    # Makes sure the given raw values are stored in the database table.
+    """
+        Stores the given raw values in the dictionary table, so that SQL queries can join with it.
+        Values already known locally are not normalized again, and every value is appended in a single query.
+
+        Args:
+            raw_values (iterable): Unique, non-null raw values.
+    """
+    def register(self, raw_values):
+        raw_values = list(raw_values)
+        known_locally = {value: self.entries[value] for value in raw_values if value in self.entries}
+        self.append_entries({**known_locally, **self.resolve_entries(raw_values)})
+
+    # Normalizes several text columns of a DataFrame through the dictionary.
+    """
+        Normalizes the given columns with a single dictionary lookup over their unique values.
+
+        Args:
+            frame (DataFrame): DataFrame holding only the columns to normalize.
+
+        Returns:
+            DataFrame: The normalized columns, with null or empty values set to None.
+    """
+    def normalize_frame(self, frame):
+        unique_values = pd.unique(frame.to_numpy().ravel())
+        mapping = self.lookup([value for value in unique_values if not pd.isna(value)])
+
+        def normalize_column(column):
+            normalized = column.map(mapping).astype(object)
+            return normalized.where(normalized.notna(), None)
+
+        return frame.apply(normalize_column)
@@ -0,0 +1,201 @@
+import os
+import pandas as pd
+
+# Audio features averaged in the reporting aggregates
+AUDIO_FEATURES = ['popularity', 'duration_ms', 'danceability', 'energy', 'loudness', 'speechiness',
+                  'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo']
+
+# Aggregate tables, the dimension they are keyed by, and the query computing their rows
+AGGREGATES = {
+    'agg_nominations_by_genre': {
+        'dimension': 'track_genre',
+        'select': '''SELECT "track_genre",
+    COUNT(DISTINCT "track_id"),
+    COUNT(DISTINCT "track_id") FILTER (WHERE "grammy_nomination"),
+    COUNT(*) FILTER (WHERE "grammy_nomination")
+FROM {source_table}
+WHERE "track_genre" IS NOT NULL{key_filter}
+GROUP BY "track_genre"''',
+    },
+    'agg_audio_features_by_genre': {
+        'dimension': 'track_genre',
+        'select': '''SELECT "track_genre", "grammy_nomination", COUNT(*),
+    ''' + ',\n    '.join(f'SUM("{feature}")' for feature in AUDIO_FEATURES) + ''',
+    ''' + ',\n    '.join(f'COUNT("{feature}")' for feature in AUDIO_FEATURES) + '''
+FROM {source_table}
+WHERE "track_genre" IS NOT NULL{key_filter}
+GROUP BY "track_genre", "grammy_nomination"''',
+    },
+    'agg_nominations_by_year': {
+        'dimension': 'year',
+        'select': '''SELECT "year",
+    COUNT(DISTINCT ("category", "nominee", "artist")),
+    COUNT(DISTINCT ("category", "nominee", "artist")) FILTER (WHERE "grammy_nomination"),
+    COUNT(DISTINCT ("category", "nominee", "artist")) FILTER (WHERE lower("winner"::text) = 'true')
+FROM {source_table}
+WHERE "year" IS NOT NULL{key_filter}
+GROUP BY "year"''',
+    },
+}
+
+class ReportingAggregates:
+    # Initializes the ReportingAggregates class with the database service and the clean table.
+    """
+        Initializes the ReportingAggregates class, which maintains small pre-aggregated tables for the
+        dashboards: nominations per genre, audio-feature sums and non-null counts of nominated and
+        non-nominated tracks per genre (averaged by the 'agg_audio_features_by_nomination' view), and
+        nominations per year.
+
+        Args:
+            db_service (PostgreSQLConnection): Database service used to run the queries.
+            source_table (str): Name of the clean table. Default is 'spotify_grammy_clean'.
+            schema_path (str): Path of the SQL script creating the aggregate tables.
+    """
+    def __init__(self, db_service, source_table='spotify_grammy_clean',
+                 schema_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'sql', 'schema_reporting_aggregates.sql')):
+        self.db_service = db_service
+        self.source_table = source_table
+        self.schema_path = schema_path
+
+    # Creates the aggregate tables, the refresh state table and the source indexes if needed.
+    """
+        Creates the aggregate tables and the view if they do not exist, and indexes the dimensions of
+        the clean table so that incremental refreshes only read the affected rows.
+    """
+    def ensure_tables(self):
+        self.db_service.run_query(query=self.db_service.open_query(self.schema_path))
+        self.db_service.run_query(query='\n'.join(
+            f'CREATE INDEX IF NOT EXISTS "{self.source_table}_{dimension}_idx" ON "{self.source_table}" ("{dimension}");'
+            for dimension in sorted({aggregate['dimension'] for aggregate in AGGREGATES.values()})
+        ))
+
+    # Computes a fingerprint of the rows of each key of a dimension.
+    """
+        Computes an order-independent fingerprint of the rows of each key of a dimension.
+
+        Args:
+            df (DataFrame): The data loaded into the clean table.
+            dimension (str): Column the aggregates are keyed by.
+
+        Returns:
+            dict: Key text mapped to a tuple (original key value, fingerprint).
+    """
+    def key_fingerprints(self, df, dimension):
+        data = df[df[dimension].notna()]
+        row_hashes = pd.util.hash_pandas_object(data.astype(str), index=False)
+        grouped = row_hashes.groupby(data[dimension].to_numpy()).agg(['sum', 'size'])
+        # Read the columns separately: iterating over rows would upcast the uint64 sums to float64
+        return {
+            str(key): (key.item() if hasattr(key, 'item') else key, f"{int(hash_sum)}:{int(size)}")
+            for key, hash_sum, size in zip(grouped.index, grouped['sum'].to_numpy(), grouped['size'].to_numpy())
+        }
+
+    # Finds the keys whose rows changed since the previous refresh.
+    """
+        Compares the fingerprints of the loaded data with the ones stored at the previous refresh.
+
+        Args:
+            df (DataFrame): The data loaded into the clean table.
+            dimension (str): Column the aggregates are keyed by.
+
+        Returns:
+            tuple: (list of changed or removed key values, or None when there is no previous refresh,
+            dict of current fingerprints).
+    """
+    def changed_keys(self, df, dimension):
+        current = self.key_fingerprints(df, dimension)
+        rows = self.db_service.run_select_query(
+            'SELECT "key_value", "fingerprint" FROM "reporting_refresh_state" WHERE "dimension" = %s', (dimension,)
+        )
+        if isinstance(rows, str):
+            raise Exception(rows)
+        previous = dict(rows)
+        if not previous:
+            return None, current  # First refresh: rebuild the whole dimension
+
+        changed = [value for key, (value, fingerprint) in current.items() if previous.get(key) != fingerprint]
+        removed = [key for key in previous if key not in current]
+        # Removed keys are deleted from the aggregates, converted back to the type of the dimension
+        if pd.api.types.is_numeric_dtype(df[dimension]):
+            removed = [float(key) for key in removed]
+        changed.extend(removed)
+        return changed, current
+
+    # Stores the fingerprints used to detect the next changes.
+    """
+        Replaces the stored fingerprints of a dimension.
+
+        Args:
+            dimension (str): Column the aggregates are keyed by.
+            fingerprints (dict): Fingerprints returned by `changed_keys`.
+    """
+    def save_fingerprints(self, dimension, fingerprints):
+        self.db_service.run_query(query='DELETE FROM "reporting_refresh_state" WHERE "dimension" = %s', params=(dimension,))
+        if fingerprints:
+            self.db_service.run_batch_query(
+                'INSERT INTO "reporting_refresh_state" ("dimension", "key_value", "fingerprint") VALUES %s',
+                [(dimension, key, fingerprint) for key, (_, fingerprint) in fingerprints.items()]
+            )
+
+    # Refreshes the aggregate tables, fully or only for the given keys.
+    """
+        Refreshes every aggregate table in a single transaction. For each dimension, only the rows of
+        the given keys are deleted and recomputed; a dimension without keys is rebuilt entirely.
+
+        Args:
+            changed_keys (dict): Dimension mapped to the list of keys to refresh, or None to rebuild it.
+                Default is None (rebuild every aggregate).
+
+        Returns:
+            str: Confirmation message.
+    """
+    def refresh(self, changed_keys=None):
+        changed_keys = changed_keys or {}
+        statements = []
+        params = {}
+        for table_name, aggregate in AGGREGATES.items():
+            dimension = aggregate['dimension']
+            keys = changed_keys.get(dimension)
+            if keys is None:
+                statements.append(f'DELETE FROM "{table_name}";')
+                key_filter = ''
+            elif not keys:
+                continue  # Nothing changed for this dimension
+            else:
+                params[dimension] = list(keys)
+                statements.append(f'DELETE FROM "{table_name}" WHERE "{dimension}" = ANY(%({dimension})s);')
+                key_filter = f' AND "{dimension}" = ANY(%({dimension})s)'
+            select = aggregate['select'].format(source_table=f'"{self.source_table}"', key_filter=key_filter)
+            statements.append(f'INSERT INTO "{table_name}"\n{select};')
+
+        if not statements:
+            return "✓ Reporting aggregates already up to date."
+        self.db_service.run_query(query='\n'.join(statements), params=params or None)
+        return "✓ Reporting aggregates refreshed."
+
+    # Refreshes the aggregates after a load, recomputing only the keys whose rows changed.
+    """
+        Refreshes the aggregates after loading `df` into the clean table. Keys whose rows are unchanged
+        since the previous refresh are skipped; the first refresh rebuilds everything.
+
+        Args:
+            df (DataFrame): The data loaded into the clean table.
+
+        Returns:
+            str: Confirmation message.
+    """
+    def run_refresh(self, df):
+        self.ensure_tables()
+        changed = {}
+        fingerprints = {}
+        for dimension in sorted({aggregate['dimension'] for aggregate in AGGREGATES.values()}):
+            changed[dimension], fingerprints[dimension] = self.changed_keys(df, dimension)
+            if changed[dimension] is None:
+                print(f"Reporting aggregates: rebuilding every '{dimension}' key.")
+            else:
+                print(f"Reporting aggregates: {len(changed[dimension])} of {len(fingerprints[dimension])} '{dimension}' keys changed.")
+
+        result = self.refresh(changed)
+        for dimension, dimension_fingerprints in fingerprints.items():
+            self.save_fingerprints(dimension, dimension_fingerprints)
+        return result
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+class SharedStringEncoder:
+    # Initializes the SharedStringEncoder class with an empty vocabulary.
+    """
+        Initializes the SharedStringEncoder class.
+
+        The encoder maps strings coming from several columns (and DataFrames) into a single int32 code space,
+        so equal strings get equal codes wherever they appear. Null values are encoded as -1.
+    """
+    def __init__(self):
+        self.vocabulary = pd.Index([], dtype=object)
+
+    # Builds the shared vocabulary and encodes every given column in a single hashing pass.
+    """
+        Builds the vocabulary from the given columns and returns their codes.
+
+        Args:
+            columns (list): Series or arrays of strings sharing the code space.
+
+        Returns:
+            list: One int32 NumPy array of codes per input column, in the same order.
+    """
+    def fit_transform(self, columns):
+        arrays = [np.asarray(column, dtype=object) for column in columns]
+        codes, uniques = pd.factorize(np.concatenate(arrays) if arrays else np.array([], dtype=object))
+        self.vocabulary = pd.Index(uniques, dtype=object)
+
+        codes = codes.astype('int32')
+        bounds = np.cumsum([0] + [len(array) for array in arrays])
+        return [codes[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    # Decodes codes back to strings.
+    """
+        Decodes codes back to their strings.
+
+        Args:
+            codes (Series): Codes to decode; negative or missing codes decode to None.
+
+        Returns:
+            ndarray: Object array of strings.
+    """
+    def inverse_transform(self, codes):
+        codes = pd.Series(codes).fillna(-1).to_numpy(dtype='int64')
+        values = self.vocabulary.to_numpy(dtype=object)
+        decoded = np.full(len(codes), None, dtype=object)
+        valid = codes >= 0
+        decoded[valid] = values[codes[valid]]
+        return decoded
@@ -0,0 +1,77 @@
+"""
+Parse-time benchmark for the Airflow DAG file.
+
+The scheduler re-parses airflow/dags/spotify_etl_dag.py every few seconds, so importing it must stay cheap.
+Each repetition runs in a fresh interpreter where Airflow is already imported (as in the scheduler), then
+times the import of the DAG file and lists the modules it pulled in.
+
+The benchmark fails (exit code 1) if the median import time exceeds the budget or if the DAG file imports
+any of the heavy modules that must only be loaded inside the task callables.
+
+Usage:
+    python benchmarks/dag_parse_benchmark.py [--budget-ms 100] [--repeats 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DAG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'airflow', 'dags', 'spotify_etl_dag.py')
+
+# Modules that must not be imported while parsing the DAG
+HEAVY_MODULES = [
+    'pandas', 'numpy', 'psycopg2', 'dotenv', 'unidecode', 'pyarrow',
+    'connections', 'utils', 'etl_spotify', 'etl_grammy', 'etl_grammy_spotify_merge', 'normalization_dictionary', 'etl_sql_pushdown', 'reporting_aggregates',
+    'etl_spotify_near_duplicates',
+]
+
+# Code run in a fresh interpreter for each repetition
+PARSE_SNIPPET = '''
+import importlib.util, json, sys, time
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+baseline = set(sys.modules)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('spotify_etl_dag', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': sorted(set(sys.modules) - baseline)}))
+'''
+
+def parse_once(dag_path):
+    """Imports the DAG file in a fresh interpreter and returns the import time and the newly imported modules."""
+    result = subprocess.run([sys.executable, '-c', PARSE_SNIPPET, dag_path], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the import time of the Spotify/Grammy DAG file.')
+    parser.add_argument('--dag-path', default=DAG_PATH, help='Path of the DAG file to parse.')
+    parser.add_argument('--budget-ms', type=float, default=100.0, help='Maximum median import time in milliseconds.')
+    parser.add_argument('--repeats', type=int, default=5, help='Number of fresh-interpreter imports.')
+    args = parser.parse_args()
+
+    runs = [parse_once(os.path.abspath(args.dag_path)) for _ in range(args.repeats)]
+    timings_ms = [run['seconds'] * 1000 for run in runs]
+    median_ms = statistics.median(timings_ms)
+    imported = {module.split('.')[0] for run in runs for module in run['modules']}
+    heavy_imported = sorted(imported.intersection(HEAVY_MODULES))
+
+    print(f"DAG import time: median {median_ms:.1f} ms, min {min(timings_ms):.1f} ms, max {max(timings_ms):.1f} ms (budget {args.budget_ms:.1f} ms)")
+
+    failed = False
+    if median_ms > args.budget_ms:
+        print(f"✗ Median DAG import time exceeds the budget of {args.budget_ms:.1f} ms.")
+        failed = True
+    if heavy_imported:
+        print(f"✗ Heavy modules imported at parse time: {', '.join(heavy_imported)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✓ DAG parse time within budget.")
+
+if __name__ == '__main__':
+    main()
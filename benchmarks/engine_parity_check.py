@@ -0,0 +1,101 @@
+"""
+Parity check between the pandas and SQL ETL engines.
+
+Starts a disposable PostgreSQL cluster (see load_benchmark.py), seeds 'spotify_staging' and 'grammy_staging'
+with synthetic rows (accented artist names, rows filtered out by the ETL, Grammy rows without artist), then
+transforms both tables with the pandas engine (EtlSpotifyAirflow, EtlGrammyAirflow) and with the SQL engine
+(EtlSpotifySql, EtlGrammySql), both using the normalization dictionary as the DAG does. The outputs are
+compared with compare_engines.
+
+The check fails (exit code 1) if the outputs of the engines differ for any dataset. PostgreSQL refuses to
+run as root, so run it as an unprivileged user.
+
+Usage:
+    python benchmarks/engine_parity_check.py [--scale 20000] [--seed 42] [--pg-bindir DIR]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from load_benchmark import ROOT_DIR, TemporaryPostgres, find_pg_bindir, seed_database
+
+SELECT_ALL_ROWS_PATH = os.path.join(ROOT_DIR, 'sql', 'queries', 'select_all_rows.sql')
+
+def add_project_paths():
+    """Adds 'airflow/src' (ETL classes) and 'src' (database connection) to the Python path."""
+    for path in (os.path.join(ROOT_DIR, 'airflow', 'src'), os.path.join(ROOT_DIR, 'src')):
+        if path not in sys.path:
+            sys.path.append(path)
+
+def run_engines(db_service, cache_dir):
+    """
+    Transforms both staging tables with each engine.
+
+    Returns:
+    dict: (SQL output, pandas output) per dataset.
+    """
+    from etl_grammy import EtlGrammyAirflow
+    from etl_spotify import EtlSpotifyAirflow
+    from etl_sql_pushdown import EtlGrammySql, EtlSpotifySql
+    from normalization_dictionary import NormalizationDictionary
+
+    def dictionary(name):
+        return NormalizationDictionary(db_service=db_service, cache_path=os.path.join(cache_dir, f'{name}.pkl'))
+
+    spotify_data = db_service.create_dataframe(query_path=SELECT_ALL_ROWS_PATH, table_name='spotify_staging')
+    grammy_data = db_service.create_dataframe(query_path=SELECT_ALL_ROWS_PATH, table_name='grammy_staging')
+    return {
+        'spotify': (EtlSpotifySql(db_service, normalization_dictionary=dictionary('spotify_sql')).run_etl(),
+                    EtlSpotifyAirflow(spotify_data, normalization_dictionary=dictionary('spotify_pandas')).run_etl()),
+        'grammy': (EtlGrammySql(db_service, normalization_dictionary=dictionary('grammy_sql')).run_etl(),
+                   EtlGrammyAirflow(grammy_data, normalization_dictionary=dictionary('grammy_pandas')).run_etl()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the pandas and SQL ETL engines produce the same output.')
+    parser.add_argument('--scale', type=int, default=20000, help='Number of Spotify staging rows.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the synthetic data generator.')
+    parser.add_argument('--pg-bindir', help='Directory of the PostgreSQL server binaries (initdb, pg_ctl).')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary cluster directory.')
+    args = parser.parse_args()
+
+    if hasattr(os, 'geteuid') and os.geteuid() == 0:
+        raise SystemExit("✗ PostgreSQL cannot run as root: run the parity check as an unprivileged user.")
+    bindir = find_pg_bindir(args.pg_bindir)
+    base_dir = tempfile.mkdtemp(prefix='engine_parity_')
+    cluster = TemporaryPostgres(bindir, base_dir)
+    try:
+        cluster.start()
+        cluster.admin('CREATE DATABASE "engine_parity"')
+        staging_rows = seed_database(cluster.dsn('engine_parity'), args.scale, args.seed)
+        print(f"✓ Seeded the staging tables: {staging_rows}")
+        cluster.use_database('engine_parity')
+
+        add_project_paths()
+        from connections.db import PostgreSQLConnection
+        outputs = run_engines(PostgreSQLConnection(), os.path.join(base_dir, 'cache'))
+    finally:
+        cluster.stop()
+        if args.keep:
+            print(f"Cluster directory kept in {base_dir}")
+        else:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    from etl_sql_pushdown import compare_engines
+    failed = False
+    for dataset, (sql_df, pandas_df) in outputs.items():
+        report = compare_engines(sql_df, pandas_df)
+        if report['equal']:
+            print(f"✓ {dataset}: both engines return the same {report['rows_sql']} rows.")
+        else:
+            print(f"✗ {dataset}: the engines differ: {json.dumps(report)}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
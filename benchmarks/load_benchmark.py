@@ -0,0 +1,455 @@
+"""
+End-to-end load benchmark for the Spotify/Grammy DAG.
+
+Starts a disposable PostgreSQL cluster from the local server binaries (initdb/pg_ctl, found on PATH, with
+`pg_config --bindir` or with --pg-bindir), listening only on a Unix socket in a temporary directory. For each
+scale, 'spotify_staging' and 'grammy_staging' are seeded once with synthetic rows into a template database;
+every repetition then runs on a fresh copy of it.
+
+Each DAG task callable runs in its own forked process, as Airflow's task runner does, with a file-backed
+XCom. For every task the benchmark reports the wall time (p50/p95 over the repetitions), the rows read or
+written through PostgreSQLConnection per second, the p50/p95 statement latency and the peak RSS of the task
+process (from wait4). Forked children start from the benchmark process, whose own RSS is printed as the
+baseline. Mapped task instances (--sharding) run one after another and are reported summed. Airflow
+must be importable, since the DAG file is loaded to get the callables.
+
+PostgreSQL refuses to run as root, so run the benchmark as an unprivileged user.
+
+Usage:
+    python benchmarks/load_benchmark.py [--scales 10000,50000] [--repeats 3] [--engine pandas|sql|auto]
+                                        [--sharding none|genre|hash] [--json results.json]
+"""
+
+import argparse
+import csv
+import importlib.util
+import io
+import json
+import math
+import os
+import pickle
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DAG_PATH = os.path.join(ROOT_DIR, 'airflow', 'dags', 'spotify_etl_dag.py')
+SQL_DIR = os.path.join(ROOT_DIR, 'sql')
+
+GENRES = ['acoustic', 'alt-rock', 'blues', 'classical', 'country', 'dance', 'edm', 'folk', 'funk', 'gospel',
+          'hip-hop', 'indie', 'j-pop', 'jazz', 'k-pop', 'latin', 'metal', 'pop', 'punk', 'r-n-b',
+          'reggae', 'rock', 'salsa', 'samba', 'soul', 'synth-pop', 'tango', 'techno', 'trance', 'world-music']
+CATEGORIES = ['Record Of The Year', 'Album Of The Year', 'Song Of The Year', 'Best New Artist',
+              'Best Pop Vocal Album', 'Best R&B Performance', 'Best Rap Song', 'Best Rock Performance',
+              'Best Jazz Instrumental Solo', 'Best Classical Compendium', 'Best Music Video', 'Best Engineered Recording']
+ARTIST_NAMES = ['Beyoncé', 'Rosalía', 'Björk', 'Sigur Rós', 'Mötley Crüe', 'Daddy Yankee', 'Adele', 'Drake']
+
+# Synthetic data
+
+def track_id(index):
+    """Returns a 22-character base62 identifier, shaped like a Spotify track id."""
+    alphabet = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+    value = (index + 1) * 2654435761 % (62 ** 22)
+    chars = []
+    for _ in range(22):
+        value, digit = divmod(value, 62)
+        chars.append(alphabet[digit])
+    return ''.join(chars)
+
+def generate_spotify_rows(rows, rng):
+    """
+    Generates synthetic 'spotify_staging' rows. About 15% of the rows repeat an earlier track under another
+    genre, as in the real catalog, and a few rows are filtered out by the ETL (zero duration or time signature).
+    """
+    artist_count = max(50, rows // 8)
+    artists = [f"{rng.choice(ARTIST_NAMES)} {index}" for index in range(artist_count)]
+    tracks = []
+    for index in range(rows):
+        if tracks and rng.random() < 0.15:
+            track = dict(rng.choice(tracks), track_genre=rng.choice(GENRES))
+        else:
+            names = rng.sample(artists, 2) if rng.random() < 0.1 else [rng.choice(artists)]
+            track = {
+                'track_id': track_id(len(tracks)),
+                'artists': ';'.join(names),
+                'album_name': f"Album {rng.randrange(artist_count * 2)}",
+                'track_name': f"Song {len(tracks)}",
+                'popularity': rng.randrange(101),
+                'duration_ms': 0 if rng.random() < 0.01 else rng.randrange(60000, 400000),
+                'explicit_column': rng.random() < 0.2,
+                'danceability': round(rng.random(), 3),
+                'energy': round(rng.random(), 3),
+                'key_column': rng.randrange(12),
+                'loudness': round(rng.uniform(-30, 0), 3),
+                'mode': rng.randrange(2),
+                'speechiness': round(rng.random(), 4),
+                'acousticness': round(rng.random(), 4),
+                'instrumentalness': round(rng.random(), 4),
+                'liveness': round(rng.random(), 4),
+                'valence': round(rng.random(), 4),
+                'tempo': round(rng.uniform(60, 200), 3),
+                'time_signature': 0 if rng.random() < 0.01 else rng.choice([3, 4, 4, 4, 5]),
+                'track_genre': rng.choice(GENRES),
+            }
+            tracks.append(track)
+        yield [index] + list(track.values())
+
+def generate_grammy_rows(rows, spotify_rows, rng):
+    """
+    Generates synthetic 'grammy_staging' rows. Most nominees are songs or albums of the Spotify rows,
+    and some artists are only present in the 'workers' column.
+    """
+    for _ in range(rows):
+        year = rng.randrange(1958, 2020)
+        track = rng.choice(spotify_rows)
+        choice = rng.random()
+        nominee = track[4] if choice < 0.6 else track[3] if choice < 0.8 else f"Work {rng.randrange(rows)}"
+        artist = track[2].split(';')[0]
+        workers = f"Producer {rng.randrange(rows)}, producer ({artist})"
+        timestamp = f"{year + 1}-02-10T05:10:28-07:00"
+        yield [year, f"{year - 1957}th Annual GRAMMY Awards  ({year})", timestamp, timestamp, rng.choice(CATEGORIES),
+               nominee, None if rng.random() < 0.1 else artist, workers, f"https://www.grammy.com/img/{rng.randrange(rows)}.jpg",
+               rng.random() < 0.2]
+
+def copy_rows(cursor, table_name, rows):
+    """Loads rows into a table with COPY, in CSV format (empty unquoted fields are NULL)."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f'COPY "{table_name}" FROM STDIN WITH (FORMAT csv)', buffer)
+
+def seed_database(dsn, scale, seed):
+    """
+    Creates the staging tables and loads `scale` Spotify rows and about scale / 24 Grammy rows. The rows are
+    generated in a forked process so that they do not inflate the RSS the task processes start from.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            with os.fdopen(write_fd, 'w') as pipe:
+                json.dump(load_staging_rows(dsn, scale, seed), pipe)
+            status = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        output = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError("✗ Seeding the staging tables failed (see the traceback above).")
+    return json.loads(output)
+
+def load_staging_rows(dsn, scale, seed):
+    """Generates the synthetic rows and copies them into the staging tables."""
+    import psycopg2
+    rng = random.Random(seed)
+    spotify_rows = list(generate_spotify_rows(scale, rng))
+    grammy_rows = list(generate_grammy_rows(max(200, scale // 24), spotify_rows, rng))
+    with psycopg2.connect(**dsn) as connection, connection.cursor() as cursor:
+        for table_name in ('spotify_staging', 'grammy_staging'):
+            with open(os.path.join(SQL_DIR, f'schema_{table_name}.sql'), encoding='utf-8') as file:
+                cursor.execute(file.read())
+        copy_rows(cursor, 'spotify_staging', spotify_rows)
+        copy_rows(cursor, 'grammy_staging', grammy_rows)
+        cursor.execute('ANALYZE')
+    connection.close()
+    return {'spotify_staging': len(spotify_rows), 'grammy_staging': len(grammy_rows)}
+
+# Disposable PostgreSQL cluster
+
+def find_pg_bindir(pg_bindir=None):
+    """Finds the directory of the PostgreSQL server binaries."""
+    if pg_bindir:
+        return pg_bindir
+    initdb = shutil.which('initdb')
+    if initdb:
+        return os.path.dirname(initdb)
+    if shutil.which('pg_config'):
+        bindir = subprocess.run(['pg_config', '--bindir'], capture_output=True, text=True, check=True).stdout.strip()
+        if os.path.exists(os.path.join(bindir, 'initdb')):
+            return bindir
+    raise SystemExit("✗ PostgreSQL server binaries not found: add initdb to PATH or pass --pg-bindir.")
+
+class TemporaryPostgres:
+    def __init__(self, bindir, base_dir, port=5432):
+        """
+        Disposable PostgreSQL cluster in `base_dir`, reachable only through a Unix socket in that directory.
+
+        Args:
+        bindir (str): Directory of initdb and pg_ctl.
+        base_dir (str): Directory holding the data directory, the socket and the server log.
+        port (int): Port number, only used to name the socket file.
+        """
+        self.bindir = bindir
+        self.data_dir = os.path.join(base_dir, 'data')
+        self.socket_dir = base_dir
+        self.log_path = os.path.join(base_dir, 'postgres.log')
+        self.port = port
+
+    def start(self):
+        subprocess.run([os.path.join(self.bindir, 'initdb'), '-D', self.data_dir, '-U', 'postgres', '-A', 'trust',
+                        '-E', 'UTF8', '--locale=C'], check=True, capture_output=True)
+        options = f"-k {self.socket_dir} -p {self.port} -c listen_addresses=''"
+        subprocess.run([os.path.join(self.bindir, 'pg_ctl'), '-D', self.data_dir, '-l', self.log_path, '-o', options, '-w', 'start'],
+                       check=True, capture_output=True)
+        print(f"✓ Temporary PostgreSQL cluster started in {self.data_dir}")
+
+    def stop(self):
+        subprocess.run([os.path.join(self.bindir, 'pg_ctl'), '-D', self.data_dir, '-m', 'fast', '-w', 'stop'], capture_output=True)
+
+    def dsn(self, database='postgres'):
+        return {'host': self.socket_dir, 'port': self.port, 'user': 'postgres', 'dbname': database}
+
+    def admin(self, statement):
+        """Runs a statement outside a transaction in the 'postgres' database (e.g. CREATE DATABASE)."""
+        import psycopg2
+        connection = psycopg2.connect(**self.dsn())
+        connection.autocommit = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(statement)
+        finally:
+            connection.close()
+
+    def use_database(self, database):
+        """Points the PostgreSQLConnection environment variables at a database of the cluster."""
+        os.environ.update({
+            'DatabaseUserStaging': 'postgres', 'DatabasePasswordStaging': '', 'DatabaseHostStaging': self.socket_dir,
+            'DatabasePortStaging': str(self.port), 'DatabaseNameStaging': database,
+        })
+
+# Task execution
+
+class FileTaskInstance:
+    def __init__(self, xcom_dir, task_id, map_index=-1):
+        """
+        Minimal stand-in for Airflow's TaskInstance, storing XCom values as pickles so they cross process boundaries.
+
+        Args:
+        xcom_dir (str): Directory where the XCom values are stored.
+        task_id (str): Id of the running task.
+        map_index (int): Index of a mapped task instance, -1 otherwise.
+        """
+        self.xcom_dir = xcom_dir
+        self.task_id = task_id
+        self.map_index = map_index
+
+    def xcom_push(self, key, value):
+        with open(os.path.join(self.xcom_dir, f'{self.task_id}__{self.map_index}__{key}.pkl'), 'wb') as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def xcom_pull(self, task_ids, key='return_value'):
+        """Returns the value pushed by a task, or the list of values pushed by the instances of a mapped task."""
+        values = {}
+        for file_name in os.listdir(self.xcom_dir):
+            task_id, map_index, file_key = file_name[:-len('.pkl')].split('__', 2)
+            if task_id == task_ids and file_key == key:
+                with open(os.path.join(self.xcom_dir, file_name), 'rb') as file:
+                    values[int(map_index)] = pickle.load(file)
+        if not values:
+            return None
+        if list(values) == [-1]:
+            return values[-1]
+        return [values[index] for index in sorted(values)]
+
+def run_task(dag_module, work_dir, run_id, task_id, callable_name, op_kwargs=None, map_index=-1):
+    """
+    Runs one task callable in a forked process and waits for it.
+
+    Returns:
+    dict: Wall time, database rows and statement latencies of the task, and the peak RSS of its process.
+    """
+    result_path = os.path.join(work_dir, f'result_{task_id}_{map_index}.json')
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.chdir(work_dir)
+            ti = FileTaskInstance(os.path.join(work_dir, 'xcom'), task_id, map_index)
+            task_start = time.perf_counter()
+            value = getattr(dag_module, callable_name)(**(op_kwargs or {}), ti=ti, run_id=run_id)
+            if value is not None:
+                ti.xcom_push('return_value', value)
+            result = {'task_seconds': time.perf_counter() - task_start, 'db_rows': 0, 'statement_ms': []}
+            if dag_module.get_db_service.cache_info().currsize:
+                records = dag_module.get_db_service().query_metrics.records
+                result['db_rows'] = sum(record['rows'] or 0 for record in records)
+                result['statement_ms'] = [record['duration_ms'] for record in records]
+            with open(result_path, 'w', encoding='utf-8') as file:
+                json.dump(result, file)
+            status = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    _, status, usage = os.wait4(pid, 0)
+    wall_seconds = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"✗ Task {task_id} failed (see the traceback above).")
+    with open(result_path, encoding='utf-8') as file:
+        result = json.load(file)
+    result.update({'task_id': task_id, 'map_index': map_index, 'wall_seconds': wall_seconds,
+                   'peak_rss_mb': usage.ru_maxrss / 1024})
+    return result
+
+def run_pipeline(dag_module, work_dir, run_id):
+    """Runs every task of the DAG in dependency order and returns the result of each task."""
+    os.makedirs(os.path.join(work_dir, 'xcom'))
+    results = []
+    if dag_module.spotify_sharding == 'none':
+        results.append(run_task(dag_module, work_dir, run_id, 'load_spotify_dataset', 'load_spotify_dataset'))
+        results.append(run_task(dag_module, work_dir, run_id, 'transform_spotify_data', 'run_etl_spotify_with_data'))
+    else:
+        results.append(run_task(dag_module, work_dir, run_id, 'list_spotify_shards', 'list_spotify_shards'))
+        shards = FileTaskInstance(os.path.join(work_dir, 'xcom'), 'benchmark').xcom_pull('list_spotify_shards')
+        for map_index, op_kwargs in enumerate(shards):
+            results.append(run_task(dag_module, work_dir, run_id, 'transform_spotify_shard', 'run_etl_spotify_shard', op_kwargs, map_index))
+        results.append(run_task(dag_module, work_dir, run_id, 'transform_spotify_data', 'reduce_spotify_shards'))
+    for task_id, callable_name in [
+        ('load_grammy_dataset', 'load_grammy_dataset'),
+        ('transform_grammy_data', 'run_etl_grammy_with_data'),
+        ('merge_datasets', 'run_etl_grammy_spotify_merge'),
+        ('infer_schema_and_seed', 'infer_schema_and_seed'),
+        ('create_table_and_insert_data', 'load_data_to_postgres'),
+        ('refresh_reporting_aggregates', 'refresh_reporting_aggregates'),
+    ]:
+        results.append(run_task(dag_module, work_dir, run_id, task_id, callable_name))
+    return results
+
+# Reporting
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def summarize(scale, staging_rows, runs):
+    """Aggregates the task results of the repetitions of one scale (mapped task instances are summed per run)."""
+    tasks = {}
+    for run in runs:
+        per_task = {}
+        for result in run:
+            task = per_task.setdefault(result['task_id'], {'wall_seconds': 0.0, 'db_rows': 0, 'statement_ms': [], 'peak_rss_mb': 0.0})
+            task['wall_seconds'] += result['wall_seconds']
+            task['db_rows'] += result['db_rows']
+            task['statement_ms'] += result['statement_ms']
+            task['peak_rss_mb'] = max(task['peak_rss_mb'], result['peak_rss_mb'])
+        for task_id, task in per_task.items():
+            summary = tasks.setdefault(task_id, {'wall_seconds': [], 'db_rows': [], 'statement_ms': [], 'peak_rss_mb': []})
+            for metric in ('wall_seconds', 'db_rows', 'peak_rss_mb'):
+                summary[metric].append(task[metric])
+            summary['statement_ms'] += task['statement_ms']
+
+    report = {'scale': scale, 'staging_rows': staging_rows, 'tasks': {}}
+    for task_id, summary in tasks.items():
+        wall_p50 = percentile(summary['wall_seconds'], 0.5)
+        report['tasks'][task_id] = {
+            'wall_p50_s': wall_p50,
+            'wall_p95_s': percentile(summary['wall_seconds'], 0.95),
+            'db_rows': percentile(summary['db_rows'], 0.5),
+            'db_rows_per_s': percentile(summary['db_rows'], 0.5) / wall_p50 if wall_p50 else 0.0,
+            'statements': len(summary['statement_ms']) // len(runs),
+            'statement_p50_ms': percentile(summary['statement_ms'], 0.5),
+            'statement_p95_ms': percentile(summary['statement_ms'], 0.95),
+            'peak_rss_mb': max(summary['peak_rss_mb']),
+        }
+    pipeline_seconds = [sum(result['wall_seconds'] for result in run) for run in runs]
+    report['pipeline_p50_s'] = percentile(pipeline_seconds, 0.5)
+    report['pipeline_p95_s'] = percentile(pipeline_seconds, 0.95)
+    report['staging_rows_per_s'] = sum(staging_rows.values()) / report['pipeline_p50_s']
+    return report
+
+def print_report(report):
+    print(f"\nScale {report['scale']}: {report['staging_rows']['spotify_staging']} Spotify rows, {report['staging_rows']['grammy_staging']} Grammy rows")
+    print(f"{'task':<30} {'p50 s':>8} {'p95 s':>8} {'db rows':>9} {'db rows/s':>11} {'stmts':>6} {'stmt p50 ms':>12} {'stmt p95 ms':>12} {'peak RSS MB':>12}")
+    for task_id, task in report['tasks'].items():
+        print(f"{task_id:<30} {task['wall_p50_s']:>8.3f} {task['wall_p95_s']:>8.3f} {task['db_rows']:>9} {task['db_rows_per_s']:>11.0f} "
+              f"{task['statements']:>6} {task['statement_p50_ms']:>12.2f} {task['statement_p95_ms']:>12.2f} {task['peak_rss_mb']:>12.1f}")
+    print(f"Pipeline: p50 {report['pipeline_p50_s']:.2f} s, p95 {report['pipeline_p95_s']:.2f} s, {report['staging_rows_per_s']:.0f} staging rows/s")
+
+def load_dag_module(dag_path):
+    spec = importlib.util.spec_from_file_location('spotify_etl_dag', dag_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Spotify/Grammy DAG end to end on a disposable PostgreSQL cluster.')
+    parser.add_argument('--scales', default='10000,50000', help='Comma-separated numbers of Spotify staging rows.')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of runs of the pipeline per scale.')
+    parser.add_argument('--engine', choices=['pandas', 'sql', 'auto'], default='pandas', help='ETL_ENGINE used by the DAG.')
+    parser.add_argument('--sharding', choices=['none', 'genre', 'hash'], default='none', help='SPOTIFY_TRANSFORM_SHARDING used by the DAG.')
+    parser.add_argument('--pg-bindir', help='Directory of the PostgreSQL server binaries (initdb, pg_ctl).')
+    parser.add_argument('--dag-path', default=DAG_PATH, help='Path of the DAG file.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of the synthetic data generator.')
+    parser.add_argument('--json', help='Optional path of a JSON file receiving the full report.')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary cluster and work directories.')
+    args = parser.parse_args()
+    if args.sharding != 'none' and args.engine != 'pandas':
+        parser.error('--sharding requires --engine pandas: the sharded Spotify transform only runs the pandas engine.')
+
+    if hasattr(os, 'geteuid') and os.geteuid() == 0:
+        raise SystemExit("✗ PostgreSQL cannot run as root: run the benchmark as an unprivileged user.")
+    bindir = find_pg_bindir(args.pg_bindir)
+    base_dir = tempfile.mkdtemp(prefix='load_benchmark_')
+    cluster = TemporaryPostgres(bindir, base_dir)
+    reports = []
+    try:
+        cluster.start()
+        os.environ.update({'ETL_ENGINE': args.engine, 'SPOTIFY_TRANSFORM_SHARDING': args.sharding,
+                           'QUERY_METRICS_DIR': os.path.join(base_dir, 'query_metrics')})
+        dag_module = load_dag_module(os.path.abspath(args.dag_path))
+        print(f"Benchmark process RSS (baseline of every task process): {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+        for scale in [int(value) for value in args.scales.split(',')]:
+            template = f'benchmark_seed_{scale}'
+            cluster.admin(f'CREATE DATABASE "{template}"')
+            seed_start = time.perf_counter()
+            staging_rows = seed_database(cluster.dsn(template), scale, args.seed)
+            print(f"✓ Seeded {template} in {time.perf_counter() - seed_start:.1f} s: {staging_rows}")
+
+            runs = []
+            for repeat in range(args.repeats):
+                database = f'benchmark_run_{scale}_{repeat}'
+                cluster.admin(f'CREATE DATABASE "{database}" TEMPLATE "{template}"')
+                cluster.use_database(database)
+                work_dir = os.path.join(base_dir, database)
+                runs.append(run_pipeline(dag_module, work_dir, run_id=f'benchmark__{scale}__{repeat}'))
+                print(f"✓ Scale {scale}, run {repeat + 1}/{args.repeats}: {sum(result['wall_seconds'] for result in runs[-1]):.2f} s")
+                cluster.admin(f'DROP DATABASE "{database}"')
+                if not args.keep:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+            report = summarize(scale, staging_rows, runs)
+            report.update({'engine': args.engine, 'sharding': args.sharding, 'repeats': args.repeats})
+            reports.append(report)
+            print_report(report)
+    finally:
+        cluster.stop()
+        if args.keep:
+            print(f"Cluster and work directories kept in {base_dir}")
+        else:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(reports, file, indent=2)
+        print(f"✓ Report saved to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+SELECT DISTINCT "track_genre" FROM "{{table_name}}" ORDER BY "track_genre";
\ No newline at end of file
@@ -0,0 +1 @@
+SELECT * FROM "{{table_name}}" WHERE "track_genre" IS NOT DISTINCT FROM %(track_genre)s;
\ No newline at end of file
@@ -0,0 +1 @@
+SELECT * FROM "{{table_name}}" WHERE mod(hashtext(COALESCE("track_id", ''))::bigint + 2147483648, %(shard_count)s) = %(shard_index)s;
\ No newline at end of file
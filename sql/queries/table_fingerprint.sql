@@ -0,0 +1,9 @@
+SELECT c.oid,
+    pg_relation_filenode(c.oid) AS filenode,
+    pg_relation_size(c.oid) AS relation_size,
+    s.n_tup_ins,
+    s.n_tup_upd,
+    s.n_tup_del
+FROM pg_class AS c
+    LEFT JOIN pg_stat_user_tables AS s ON s.relid = c.oid
+WHERE c.oid = to_regclass(%s);
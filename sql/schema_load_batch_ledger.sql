@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS "load_batch_ledger" (
+    "run_id" TEXT NOT NULL,
+    "seed_checksum" TEXT NOT NULL,
+    "batch_start" INTEGER NOT NULL,
+    "batch_end" INTEGER NOT NULL,
+    "committed_at" TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY ("run_id", "seed_checksum", "batch_start")
+);
\ No newline at end of file
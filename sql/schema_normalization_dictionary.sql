@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS "{{table_name}}" (
+    "rules_version" TEXT NOT NULL,
+    "raw_value" TEXT NOT NULL,
+    "normalized_value" TEXT,
+    PRIMARY KEY ("rules_version", "raw_value")
+);
\ No newline at end of file
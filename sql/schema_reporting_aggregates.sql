@@ -0,0 +1,62 @@
+CREATE TABLE IF NOT EXISTS "agg_nominations_by_genre" (
+    "track_genre" TEXT PRIMARY KEY,
+    "track_count" INTEGER,
+    "nominated_track_count" INTEGER,
+    "nominations" INTEGER
+);
+CREATE TABLE IF NOT EXISTS "agg_audio_features_by_genre" (
+    "track_genre" TEXT,
+    "grammy_nomination" BOOLEAN,
+    "track_count" INTEGER,
+    "sum_popularity" FLOAT,
+    "sum_duration_ms" FLOAT,
+    "sum_danceability" FLOAT,
+    "sum_energy" FLOAT,
+    "sum_loudness" FLOAT,
+    "sum_speechiness" FLOAT,
+    "sum_acousticness" FLOAT,
+    "sum_instrumentalness" FLOAT,
+    "sum_liveness" FLOAT,
+    "sum_valence" FLOAT,
+    "sum_tempo" FLOAT,
+    "count_popularity" INTEGER,
+    "count_duration_ms" INTEGER,
+    "count_danceability" INTEGER,
+    "count_energy" INTEGER,
+    "count_loudness" INTEGER,
+    "count_speechiness" INTEGER,
+    "count_acousticness" INTEGER,
+    "count_instrumentalness" INTEGER,
+    "count_liveness" INTEGER,
+    "count_valence" INTEGER,
+    "count_tempo" INTEGER,
+    PRIMARY KEY ("track_genre", "grammy_nomination")
+);
+CREATE TABLE IF NOT EXISTS "agg_nominations_by_year" (
+    "year" FLOAT PRIMARY KEY,
+    "nominations" INTEGER,
+    "matched_nominations" INTEGER,
+    "winners" INTEGER
+);
+CREATE TABLE IF NOT EXISTS "reporting_refresh_state" (
+    "dimension" TEXT,
+    "key_value" TEXT,
+    "fingerprint" TEXT,
+    PRIMARY KEY ("dimension", "key_value")
+);
+CREATE OR REPLACE VIEW "agg_audio_features_by_nomination" AS
+SELECT "grammy_nomination",
+    SUM("track_count") AS "track_count",
+    SUM("sum_popularity") / NULLIF(SUM("count_popularity"), 0) AS "avg_popularity",
+    SUM("sum_duration_ms") / NULLIF(SUM("count_duration_ms"), 0) AS "avg_duration_ms",
+    SUM("sum_danceability") / NULLIF(SUM("count_danceability"), 0) AS "avg_danceability",
+    SUM("sum_energy") / NULLIF(SUM("count_energy"), 0) AS "avg_energy",
+    SUM("sum_loudness") / NULLIF(SUM("count_loudness"), 0) AS "avg_loudness",
+    SUM("sum_speechiness") / NULLIF(SUM("count_speechiness"), 0) AS "avg_speechiness",
+    SUM("sum_acousticness") / NULLIF(SUM("count_acousticness"), 0) AS "avg_acousticness",
+    SUM("sum_instrumentalness") / NULLIF(SUM("count_instrumentalness"), 0) AS "avg_instrumentalness",
+    SUM("sum_liveness") / NULLIF(SUM("count_liveness"), 0) AS "avg_liveness",
+    SUM("sum_valence") / NULLIF(SUM("count_valence"), 0) AS "avg_valence",
+    SUM("sum_tempo") / NULLIF(SUM("count_tempo"), 0) AS "avg_tempo"
+FROM "agg_audio_features_by_genre"
+GROUP BY "grammy_nomination";
\ No newline at end of file
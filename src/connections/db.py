@@ -1,10 +1,20 @@
 import os
+import time
+import hashlib
 from dotenv import load_dotenv
 import pandas as pd
 import psycopg2
+from psycopg2.extras import execute_values
+from connections.query_cache import QueryResultCache
+from connections.query_metrics import QueryMetrics, estimate_result_bytes
+
+# SQL file used to fingerprint the state of the tables read by a cached query
+FINGERPRINT_QUERY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'sql', 'queries', 'table_fingerprint.sql')
+# SQL file creating the ledger of committed seed batches
+LEDGER_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'sql', 'schema_load_batch_ledger.sql')
 
 class PostgreSQLConnection:
-    def __init__(self):
+    def __init__(self, cache_dir=None, cache_max_bytes=512 * 1024 * 1024, slow_query_ms=1000, slow_log_path=None, explain_slow_queries=False):
         load_dotenv(".env")
         self.user = os.getenv("DatabaseUserStaging")
         self.password = os.getenv("DatabasePasswordStaging")
@@ -13,6 +23,17 @@ class PostgreSQLConnection:
         self.database = os.getenv("DatabaseNameStaging")
         self.mydb = None
         self.mycursor = None
+        # Optional local cache of SELECT results, disabled unless a cache directory is given
+        self.query_cache = None
+        if cache_dir is not None:
+            try:
+                import pyarrow  # Parquet engine required by the cache
+                self.query_cache = QueryResultCache(cache_dir, max_bytes=cache_max_bytes)
+            except ImportError:
+                print("✗ pyarrow is not installed, the query result cache is disabled.")
+        # Statement-level timing, slow-query log and optional EXPLAIN capture
+        self.query_metrics = QueryMetrics(slow_query_ms=slow_query_ms, slow_log_path=slow_log_path)
+        self.explain_slow_queries = explain_slow_queries
 
     def open_connection(self):
         try:
@@ -52,6 +73,76 @@ class PostgreSQLConnection:
             query = select_sql_script  # Keeps the original query if table_name is None
         return query
         
+    #Build a cheap fingerprint of the current state of the given tables
+    def table_fingerprint(self, table_names):
+        fingerprint_query = self.open_query(FINGERPRINT_QUERY_PATH)
+        fingerprint = []
+        for table_name in table_names:
+            self.mycursor.execute(fingerprint_query, (f'"{table_name}"',))
+            row = self.mycursor.fetchone()
+            if row is None:
+                return None  # Unknown table, the result is not cached
+            fingerprint.append((table_name,) + tuple(row))
+        return tuple(fingerprint)
+
+    #Look up a query result in the local cache, returning its key and the cached DataFrame (or None)
+    def cached_result(self, query, params, table_names):
+        if self.query_cache is None or not table_names or self.mycursor is None:
+            return None, None
+        try:
+            fingerprint = self.table_fingerprint(table_names)
+        except psycopg2.Error:
+            self.mydb.rollback()
+            return None, None
+        if fingerprint is None:
+            return None, None
+        cache_key = self.query_cache.make_key(query, params, fingerprint)
+        return cache_key, self.query_cache.get(cache_key)
+
+    #Execute a statement and record its duration, rows and bytes transferred
+    def execute_statement(self, method, query, params=None, fetch=False, cursor=None, explain=False):
+        cursor = cursor or self.mycursor
+        start = time.perf_counter()
+        try:
+            cursor.execute(query, params)
+            results = cursor.fetchall() if fetch else None
+        except psycopg2.Error as e:
+            self.query_metrics.record(method, query, time.perf_counter() - start, bytes_sent=len(cursor.query or b''), status='error', error=str(e))
+            raise
+        entry = self.query_metrics.record(
+            method, query, time.perf_counter() - start,
+            rows=len(results) if fetch else (cursor.rowcount if cursor.rowcount >= 0 else None),
+            bytes_sent=len(cursor.query or b''),
+            bytes_received=estimate_result_bytes(results) if fetch else 0,
+            log_slow=False
+        )
+        if entry['slow']:
+            if explain and self.explain_slow_queries:
+                entry['explain'] = self.capture_explain(query, params)
+            self.query_metrics.log_slow(entry)
+        return results
+
+    #Capture the execution plan of a slow SELECT with EXPLAIN (ANALYZE, BUFFERS), only called from the read paths
+    def capture_explain(self, query, params=None):
+        if not query.lstrip().lower().startswith(('select', 'with')):
+            return None
+        # EXPLAIN ANALYZE executes the statement again: the savepoint undoes any change it makes (e.g. a
+        # data-modifying CTE) and isolates a failure, without touching the rest of the caller's transaction
+        with self.mydb.cursor() as explain_cursor:
+            explain_cursor.execute("SAVEPOINT explain_slow_query")
+            try:
+                explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", params)
+                return explain_cursor.fetchone()[0]
+            except psycopg2.Error as e:
+                return f"✗ EXPLAIN failed: {e}"
+            finally:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT explain_slow_query")
+                explain_cursor.execute("RELEASE SAVEPOINT explain_slow_query")
+
+    #Export the recorded query metrics as JSON
+    def export_query_metrics(self, file_path, include_records=True):
+        return self.query_metrics.export_json(file_path, include_records=include_records)
+
     # Decorator defined inside the class
     def connection_decorator(func):
         def wrapper(self, *args, **kwargs):
@@ -65,24 +156,79 @@ class PostgreSQLConnection:
     @connection_decorator
     def run_query(self, query, params=None):
         try:
-            self.mycursor.execute(query, params) # Use the parameters here
+            self.execute_statement('run_query', query, params) # Use the parameters here
             self.mydb.commit()
             return "✓ Query executed successfully."
         except psycopg2.Error as e:
             raise Exception(f"✗ Error executing query: {e}") 
     @connection_decorator
+    #Run a query once for many rows using a single VALUES list per page
+    def run_batch_query(self, query, rows, page_size=1000):
+        start = time.perf_counter()
+        try:
+            execute_values(self.mycursor, query, rows, page_size=page_size)
+            self.mydb.commit()
+            pages = max(1, -(-len(rows) // page_size))
+            self.query_metrics.record('run_batch_query', query, time.perf_counter() - start, rows=len(rows), bytes_sent=len(self.mycursor.query or b'') * pages)
+            return "✓ Batch query executed successfully."
+        except psycopg2.Error as e:
+            self.mydb.rollback()
+            raise Exception(f"✗ Error executing batch query: {e}")
+
+    @connection_decorator
+    #Stream CSV batches into a table with COPY over a single connection and transaction
+    def copy_batches(self, table_name, columns, batches, setup_query=None):
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        copy_query = f'COPY "{table_name}" ({column_list}) FROM STDIN WITH (FORMAT csv)'
+        total_rows = 0
+        try:
+            if setup_query:
+                self.execute_statement('copy_batches', setup_query)
+            # Each batch is a file-like object with CSV rows (no header); empty unquoted fields are NULL
+            for batch in batches:
+                start = time.perf_counter()
+                self.mycursor.copy_expert(copy_query, batch)
+                total_rows += self.mycursor.rowcount
+                self.query_metrics.record('copy_batches', copy_query, time.perf_counter() - start,
+                                          rows=self.mycursor.rowcount, bytes_sent=batch.getbuffer().nbytes if hasattr(batch, 'getbuffer') else 0)
+            self.mydb.commit()
+            return total_rows
+        except psycopg2.Error as e:
+            self.mydb.rollback()
+            raise Exception(f"✗ Error copying batches into {table_name}: {e}")
+
+    @connection_decorator
     #Run select query without commit
     def run_select_query(self, query, params=None):
         try:
-            self.mycursor.execute(query, params)
-            results = self.mycursor.fetchall()
+            results = self.execute_statement('run_select_query', query, params, fetch=True, explain=True)
             return results
         except psycopg2.Error as e:
             return f"✗ Error when executing the SELECT query:: {e}"
 
     
+    #Checksum identifying the content of a seed script in the batch ledger
+    def seed_checksum(self, sql_script):
+        return hashlib.sha256(sql_script.encode('utf-8')).hexdigest()
+
+    #Create the ledger if needed and return the start indexes of the batches already committed by a run
+    def fetch_committed_batches(self, run_id, seed_checksum):
+        self.mycursor.execute(self.open_query(LEDGER_SCHEMA_PATH))
+        self.mycursor.execute(
+            'SELECT "batch_start" FROM "load_batch_ledger" WHERE "run_id" = %s AND "seed_checksum" = %s',
+            (run_id, seed_checksum)
+        )
+        batches = {row[0] for row in self.mycursor.fetchall()}
+        self.mydb.commit()
+        return batches
+
+    @connection_decorator
+    #Return the start indexes of the batches of a seed file already committed by a run
+    def committed_batches(self, sql_file_path, run_id):
+        return self.fetch_committed_batches(run_id, self.seed_checksum(self.open_query(sql_file_path)))
+
     @connection_decorator
-    def insert_data_from_sql(self, sql_file_path):
+    def insert_data_from_sql(self, sql_file_path, run_id=None, batch_size=3000):
         try:
             # Reuse the open_query function to read the content of the SQL file
             sql_script = self.open_query(sql_file_path)
@@ -92,23 +238,51 @@ class PostgreSQLConnection:
                 print("Connection closed. Reopening...")
                 self.open_connection()
 
+            # With a run id, every committed batch is recorded in the ledger and skipped when the load is retried
+            seed_checksum = None
+            if run_id is not None:
+                seed_checksum = self.seed_checksum(sql_script)
+                done_batches = self.fetch_committed_batches(run_id, seed_checksum)
+                if done_batches:
+                    print(f"Resuming load: {len(done_batches)} batches already committed by run {run_id}.")
+            else:
+                done_batches = set()
+
             queries = sql_script.strip().split(';')  # Split the script into individual queries
-            batch_size = 3000  # Define the batch size
             total_queries = len(queries) - 1  # Exclude the last empty query
 
             with self.mydb.cursor() as cursor:
                 for i in range(0, total_queries, batch_size):
+                    if i in done_batches:
+                        continue  # Batch committed by a previous attempt
                     batch_queries = queries[i:i + batch_size]  # Select the batch of queries
                     batch_queries = [query.strip() for query in batch_queries if query.strip()]  # Clean up empty queries
                     
                     if batch_queries:  # Ensure there are queries in the batch
+                        start = time.perf_counter()
                         try:
+                            if seed_checksum is not None:
+                                # Claim the batch first: the ledger row commits atomically with the inserted rows,
+                                # and a concurrent attempt on the same batch fails on the primary key instead of duplicating rows
+                                cursor.execute(
+                                    'INSERT INTO "load_batch_ledger" ("run_id", "seed_checksum", "batch_start", "batch_end") VALUES (%s, %s, %s, %s)',
+                                    (run_id, seed_checksum, i, min(i + batch_size, total_queries))
+                                )
+                            rows_inserted = 0
                             for query in batch_queries:
                                 cursor.execute(query)  # Execute each query in the batch
+                                rows_inserted += cursor.rowcount
                             self.mydb.commit()  # Commit the changes
+                            # Each batch is recorded as one statement group to keep the metrics compact
+                            self.query_metrics.record(
+                                'insert_data_from_sql', f"{batch_queries[0]} ... ({len(batch_queries)} statements)",
+                                time.perf_counter() - start, rows=rows_inserted,
+                                bytes_sent=sum(len(query.encode('utf-8')) for query in batch_queries)
+                            )
                             print(f"✓ Successfully inserted batch starting from query index {i}.")
                         except Exception as e:
                             print(f"✗ Error inserting batch starting from query index {i}: {e}")
+                            self.query_metrics.record('insert_data_from_sql', batch_queries[0], time.perf_counter() - start, status='error', error=str(e))
                             self.mydb.rollback()  # Roll back the transaction in case of error
                             raise  # Raise the exception to stop execution
 
@@ -126,14 +300,33 @@ class PostgreSQLConnection:
             print(f"✗ Unexpected error: {e}")
             raise
     
+    @connection_decorator
+    #Create dataframe from a query string
+    def create_dataframe_from_query(self, query, params=None):
+        try:
+            rows = self.execute_statement('create_dataframe_from_query', query, params, fetch=True, explain=True)
+            colnames = [desc[0] for desc in self.mycursor.description]
+            df = pd.DataFrame(rows, columns=colnames)
+            print("✓ DataFrame created successfully.")
+            return df
+        except psycopg2.Error as e:
+            raise Exception(f"✗ Error creating DataFrame: {e}")
+
     @connection_decorator
     #Create dataframe from query
-    def create_dataframe(self, query_path, table_name):
+    def create_dataframe(self, query_path, table_name, params=None):
         try:
             select_sql_script = self.open_query(query_path, table_name)
-            rows =  self.run_select_query(select_sql_script)# Get the results after executing the query
+            # Reuse the cached result while the table is unchanged
+            cache_key, cached_df = self.cached_result(select_sql_script, params, [table_name])
+            if cached_df is not None:
+                print("✓ DataFrame loaded from the local query cache.")
+                return cached_df
+            rows =  self.run_select_query(select_sql_script, params)# Get the results after executing the query
             colnames = [desc[0] for desc in self.mycursor.description]
             df = pd.DataFrame(rows, columns=colnames)
+            if cache_key is not None:
+                self.query_cache.put(cache_key, df)
             print("✓ DataFrame created successfully.")
             return df
         except psycopg2.Error as e:
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import tempfile
+import pandas as pd
+
+class QueryResultCache:
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        """
+        Local on-disk cache of query results stored as Parquet files.
+
+        Entries are keyed by the query text, its parameters and a fingerprint of the tables it reads,
+        so a change to any of those tables produces a new key. The least recently used entries are
+        evicted once the cache grows over `max_bytes`.
+
+        Args:
+        cache_dir (str): Directory where the cached results are stored.
+        max_bytes (int): Maximum total size of the cache in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, query, params, fingerprint):
+        """Builds the cache key of a query from its text, parameters and table fingerprint."""
+        key_source = f"{query}\x00{params!r}\x00{fingerprint!r}"
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        """Returns the file path of a cache entry."""
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, key):
+        """
+        Reads a cached result and marks it as recently used.
+
+        Returns:
+        pd.DataFrame: The cached result, or None on a cache miss.
+        """
+        path = self.entry_path(key)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)  # The modification time tracks the last use for the LRU eviction
+            return df
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, df):
+        """Stores a result and evicts the least recently used entries if the cache is over its size limit."""
+        path = self.entry_path(key)
+        tmp_path = None
+        try:
+            # A unique temporary file per writer, so concurrent writers of the same key do not clobber each other
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            os.close(fd)
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"✗ Could not cache query result: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.parquet'):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue  # Another process may have evicted it already
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total_bytes -= size
+            except OSError:
+                pass  # Another process may have evicted it already
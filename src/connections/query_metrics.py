@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+class QueryMetrics:
+    def __init__(self, slow_query_ms=1000, slow_log_path=None, max_statement_chars=500):
+        """
+        Collects per-statement metrics of a PostgreSQLConnection: duration, rows affected or returned,
+        and bytes sent and received. Statements slower than `slow_query_ms` are also written to the
+        slow-query log.
+
+        Args:
+        slow_query_ms (float): Duration in milliseconds above which a statement is considered slow.
+        slow_log_path (str): Optional JSON lines file where slow statements are appended.
+        max_statement_chars (int): Maximum number of characters of each statement kept in the records.
+        """
+        self.slow_query_ms = slow_query_ms
+        self.slow_log_path = slow_log_path
+        self.max_statement_chars = max_statement_chars
+        self.records = []
+
+    def record(self, method, statement, duration_s, rows=None, bytes_sent=0, bytes_received=0, status='ok', error=None, log_slow=True):
+        """
+        Records one executed statement. Slow statements are written to the slow-query log unless
+        `log_slow` is False, in which case the caller logs them with `log_slow` once complete.
+
+        Returns:
+        dict: The stored record, so the caller can attach more information (e.g. an EXPLAIN plan).
+        """
+        entry = {
+            'timestamp': time.time(),
+            'method': method,
+            'statement': statement[:self.max_statement_chars],
+            'duration_ms': round(duration_s * 1000, 3),
+            'rows': rows,
+            'bytes_sent': bytes_sent,
+            'bytes_received': bytes_received,
+            'status': status,
+            'slow': duration_s * 1000 >= self.slow_query_ms,
+        }
+        if error is not None:
+            entry['error'] = error
+        self.records.append(entry)
+        if entry['slow']:
+            print(f"✗ Slow query ({entry['duration_ms']:.1f} ms) in {method}: {entry['statement'][:120]}")
+            if log_slow:
+                self.log_slow(entry)
+        return entry
+
+    def log_slow(self, entry):
+        """Appends a slow statement (with its EXPLAIN plan, if captured) to the slow-query log file."""
+        if self.slow_log_path is None or not entry['slow']:
+            return
+        log_dir = os.path.dirname(self.slow_log_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        with open(self.slow_log_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry, default=str) + '\n')
+
+    def summary(self):
+        """
+        Summarizes the recorded statements, in total and per connection method.
+
+        Returns:
+        dict: Summary with totals, per-method totals and the slow statements.
+        """
+        by_method = {}
+        for entry in self.records:
+            method = by_method.setdefault(entry['method'], {'statements': 0, 'duration_ms': 0.0, 'rows': 0, 'bytes_sent': 0, 'bytes_received': 0, 'errors': 0})
+            method['statements'] += 1
+            method['duration_ms'] += entry['duration_ms']
+            method['rows'] += entry['rows'] or 0
+            method['bytes_sent'] += entry['bytes_sent']
+            method['bytes_received'] += entry['bytes_received']
+            method['errors'] += entry['status'] != 'ok'
+
+        return {
+            'statements': len(self.records),
+            'duration_ms': round(sum(entry['duration_ms'] for entry in self.records), 3),
+            'rows': sum(entry['rows'] or 0 for entry in self.records),
+            'bytes_sent': sum(entry['bytes_sent'] for entry in self.records),
+            'bytes_received': sum(entry['bytes_received'] for entry in self.records),
+            'slow_query_ms': self.slow_query_ms,
+            'by_method': by_method,
+            'slow_queries': [entry for entry in self.records if entry['slow']],
+        }
+
+    def export_json(self, file_path, include_records=True):
+        """Writes the summary (and optionally every record) to a JSON file."""
+        report = self.summary()
+        if include_records:
+            report['records'] = self.records
+        export_dir = os.path.dirname(file_path)
+        if export_dir:
+            os.makedirs(export_dir, exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, default=str)
+        return f"✓ Query metrics saved to {file_path}"
+
+    def reset(self):
+        """Discards the recorded statements."""
+        self.records = []
+
+# Estimates the size of a result set from a sample of its rows
+def estimate_result_bytes(rows, sample_size=100):
+    """
+    Estimates the number of bytes received for a result set from the text size of a sample of rows.
+
+    Args:
+    rows (list): Fetched rows.
+    sample_size (int): Number of rows measured.
+
+    Returns:
+    int: Estimated size in bytes.
+    """
+    if not rows:
+        return 0
+    sample = rows[:sample_size]
+    sample_bytes = sum(len(str(value)) for row in sample for value in row if value is not None)
+    return int(sample_bytes * len(rows) / len(sample))
@@ -0,0 +1,232 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Audio features describing how a track sounds
+AUDIO_FEATURES = ['danceability', 'energy', 'loudness', 'speechiness', 'acousticness',
+                  'instrumentalness', 'liveness', 'valence', 'tempo']
+
+class AudioSimilarityIndex:
+    def __init__(self, features, track_ids, nominated, mean, std, feature_columns=AUDIO_FEATURES, squared_norms=None):
+        """
+        Nearest-neighbour index over the standardized audio features of the tracks. Distances are Euclidean,
+        computed with blocked float32 matrix products, so queries never compare all pairs of tracks at once.
+        Use `build` to create an index from a DataFrame and `save`/`load` to persist it as memory-mapped files.
+
+        Args:
+        features (ndarray): float32 matrix of standardized features, one row per track.
+        track_ids (ndarray): 'track_id' of each row.
+        nominated (ndarray): Boolean mask of the tracks with a Grammy nomination.
+        mean (ndarray): Mean of each raw feature, used to standardize queries.
+        std (ndarray): Standard deviation of each raw feature, used to standardize queries.
+        feature_columns (list): Names of the features, in column order.
+        squared_norms (ndarray): Squared norm of each row of `features`; computed when not given.
+        """
+        self.features = features
+        self.track_ids = track_ids
+        self.nominated = nominated
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
+        self.feature_columns = list(feature_columns)
+        if squared_norms is None:
+            squared_norms = np.einsum('ij,ij->i', features, features, dtype=np.float32)
+        self.squared_norms = squared_norms
+        self._positions = None
+
+    @classmethod
+    def build(cls, data, feature_columns=AUDIO_FEATURES):
+        """
+        Builds the index from the clean Spotify data or the merged data. Each 'track_id' is indexed once;
+        a track is marked as nominated if any of its rows has 'grammy_nomination'.
+
+        Args:
+        data (pd.DataFrame): Data with 'track_id', the feature columns and optionally 'grammy_nomination'.
+        feature_columns (list): Features describing the tracks.
+
+        Returns:
+        AudioSimilarityIndex: The index, held in memory.
+        """
+        data = data.dropna(subset=['track_id'])
+        nominated = data['grammy_nomination'].fillna(False).astype(bool) if 'grammy_nomination' in data.columns else pd.Series(False, index=data.index)
+        nominated = nominated.groupby(data['track_id'], sort=False).any()
+        tracks = data.drop_duplicates(subset='track_id').set_index('track_id')
+
+        raw = tracks[feature_columns].to_numpy(dtype=np.float64)
+        mean = np.nanmean(raw, axis=0)
+        std = np.nanstd(raw, axis=0)
+        std[~(std > 0)] = 1.0  # Constant features do not contribute to the distances
+        standardized = np.nan_to_num((raw - mean) / std).astype(np.float32)  # Missing values take the mean
+
+        track_ids = tracks.index.to_numpy().astype(str)
+        return cls(standardized, track_ids, nominated.loc[tracks.index].to_numpy(), mean, std, feature_columns)
+
+    def save(self, directory):
+        """
+        Saves the index as .npy files (features, their squared norms, track ids, nomination mask) and a JSON
+        file with the scaler.
+
+        Returns:
+        str: Confirmation message.
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'features.npy'), np.ascontiguousarray(self.features, dtype=np.float32))
+        np.save(os.path.join(directory, 'squared_norms.npy'), np.asarray(self.squared_norms, dtype=np.float32))
+        np.save(os.path.join(directory, 'track_ids.npy'), np.asarray(self.track_ids, dtype=str))
+        np.save(os.path.join(directory, 'nominated.npy'), np.asarray(self.nominated, dtype=bool))
+        with open(os.path.join(directory, 'index.json'), 'w', encoding='utf-8') as file:
+            json.dump({'feature_columns': self.feature_columns, 'mean': self.mean.tolist(), 'std': self.std.tolist(),
+                       'tracks': len(self.track_ids)}, file, indent=2)
+        return f"✓ Audio similarity index of {len(self.track_ids)} tracks saved to {directory}"
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Loads an index saved by `save`. The arrays are memory-mapped by default, so several processes share
+        the pages of the same files and only the blocks touched by the queries are read.
+
+        Returns:
+        AudioSimilarityIndex: The loaded index.
+        """
+        with open(os.path.join(directory, 'index.json'), encoding='utf-8') as file:
+            metadata = json.load(file)
+        norms_path = os.path.join(directory, 'squared_norms.npy')
+        return cls(
+            np.load(os.path.join(directory, 'features.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, 'track_ids.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, 'nominated.npy'), mmap_mode=mmap_mode),
+            metadata['mean'], metadata['std'], metadata['feature_columns'],
+            # Indexes saved without the norms compute them, which reads the whole feature file once
+            np.load(norms_path, mmap_mode=mmap_mode) if os.path.exists(norms_path) else None
+        )
+
+    def transform(self, data):
+        """Standardizes raw feature values (DataFrame or array in `feature_columns` order) as float32 query vectors."""
+        raw = data[self.feature_columns].to_numpy(dtype=np.float32) if isinstance(data, pd.DataFrame) else np.asarray(data, dtype=np.float32)
+        return np.nan_to_num((raw - self.mean) / self.std).astype(np.float32)
+
+    def query(self, vectors, k=10, candidates='all', query_batch_size=512, block_size=4096):
+        """
+        Finds the k nearest tracks of each standardized query vector. The database is scanned in blocks of
+        `block_size` rows, so memory stays bounded by query_batch_size x block_size. Each block costs one matrix
+        product with the batch of queries; a small first block seeds the running top-k, and in the next blocks
+        only the tracks closer than the current k-th neighbour of a query are merged into its top-k.
+
+        Args:
+        vectors (ndarray): Standardized query vectors, shape (queries, features).
+        k (int): Number of neighbours returned per query.
+        candidates (str): 'all', 'nominated' or 'non_nominated' tracks.
+        query_batch_size (int): Number of queries processed together.
+        block_size (int): Number of indexed tracks compared per matrix product.
+
+        Returns:
+        tuple: (int64 row positions, float32 distances), both of shape (queries, k), sorted by distance.
+        Positions are -1 (and distances inf) when fewer than k candidates exist.
+        """
+        if candidates not in ('all', 'nominated', 'non_nominated'):
+            raise ValueError(f"Invalid candidates value: {candidates}")
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        positions = np.full((len(vectors), k), -1, dtype=np.int64)
+        distances = np.full((len(vectors), k), np.inf, dtype=np.float32)
+
+        for start in range(0, len(vectors), query_batch_size):
+            batch = vectors[start:start + query_batch_size]
+            # |q|^2 is constant per query, so the neighbours are ranked by [q, 1] . [-2x, |x|^2] = |q - x|^2 - |q|^2
+            augmented_batch = np.hstack([batch, np.ones((len(batch), 1), dtype=np.float32)])
+            best_positions = np.full((len(batch), k), -1, dtype=np.int64)
+            best_distances = np.full((len(batch), k), np.inf, dtype=np.float32)
+            seed_size = min(max(k, 256), block_size)
+            block_starts = [0] + list(range(seed_size, len(self.features), block_size))
+            for block_start, block_end in zip(block_starts, block_starts[1:] + [len(self.features)]):
+                block = np.asarray(self.features[block_start:block_end])
+                block_norms = self.squared_norms[block_start:block_start + len(block)].copy()
+                if candidates != 'all':
+                    wanted = np.asarray(self.nominated[block_start:block_start + len(block)]) == (candidates == 'nominated')
+                    block_norms[~wanted] = np.inf  # Excluded tracks are never ranked
+                block_distances = augmented_batch @ np.hstack([-2.0 * block, block_norms[:, None]]).T
+
+                if block_start == 0:
+                    block_k = min(k, block_distances.shape[1])
+                    top = np.argpartition(block_distances, block_k - 1, axis=1)[:, :block_k]
+                    best_distances[:, :block_k] = np.take_along_axis(block_distances, top, axis=1)
+                    best_positions[:, :block_k] = top
+                else:
+                    best_distances, best_positions = self.merge_top_k(best_distances, best_positions, block_distances, block_start)
+
+            order = np.argsort(best_distances, axis=1)
+            best_distances = np.take_along_axis(best_distances, order, axis=1)
+            best_positions = np.take_along_axis(best_positions, order, axis=1)
+            best_positions[np.isinf(best_distances)] = -1
+            positions[start:start + len(batch)] = best_positions
+            batch_norms = np.einsum('ij,ij->i', batch, batch)[:, None]
+            distances[start:start + len(batch)] = np.sqrt(np.maximum(best_distances + batch_norms, 0))
+        return positions, distances
+
+    def merge_top_k(self, best_distances, best_positions, block_distances, block_start):
+        """
+        Merges into the running top-k the tracks of a block closer than the current k-th neighbour of each
+        query: the few candidates and the current top-k are sorted together by (query, distance) and the
+        first k entries of each query are kept.
+
+        Returns:
+        tuple: (distances, positions) of the new top-k, sorted by distance for each query.
+        """
+        queries, k = best_distances.shape
+        candidates = np.flatnonzero(block_distances < best_distances.max(axis=1)[:, None])
+        if len(candidates) == 0:
+            return best_distances, best_positions
+        rows, columns = np.divmod(candidates, block_distances.shape[1])
+        all_rows = np.concatenate([np.repeat(np.arange(queries), k), rows])
+        all_distances = np.concatenate([best_distances.ravel(), block_distances[rows, columns]])
+        all_positions = np.concatenate([best_positions.ravel(), columns + block_start])
+        order = np.lexsort((all_distances, all_rows))
+        # Every query has at least its k current entries, so the first k of each query fill a (queries, k) matrix
+        counts = np.bincount(all_rows, minlength=queries)
+        rank = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+        keep = order[rank < k]
+        return all_distances[keep].reshape(queries, k), all_positions[keep].reshape(queries, k)
+
+    def positions_of(self, track_ids):
+        """Returns the row position of each 'track_id' in the index, -1 for unknown tracks."""
+        if self._positions is None:
+            self._positions = pd.Index(np.asarray(self.track_ids))
+        return self._positions.get_indexer(pd.Index(track_ids, dtype=object).astype(str))
+
+    def query_by_track_ids(self, track_ids, k=10, candidates='non_nominated'):
+        """
+        Finds the k indexed tracks that sound most like each given track, excluding the track itself.
+        By default only non-nominated tracks are returned, e.g. to find tracks that sound like the nominees.
+
+        Args:
+        track_ids (list): 'track_id's of the query tracks; they must be in the index.
+        k (int): Number of neighbours per track.
+        candidates (str): 'all', 'nominated' or 'non_nominated' tracks.
+
+        Returns:
+        pd.DataFrame: One row per neighbour with 'query_track_id', 'rank', 'track_id', 'distance' and
+        'grammy_nomination'.
+        """
+        track_ids = list(track_ids)
+        query_positions = self.positions_of(track_ids)
+        if (query_positions < 0).any():
+            missing = [track_id for track_id, position in zip(track_ids, query_positions) if position < 0]
+            raise KeyError(f"Tracks not in the audio similarity index: {missing[:10]}")
+
+        # Ask for one more neighbour, since each track is its own nearest neighbour when it is a candidate
+        positions, distances = self.query(np.asarray(self.features[query_positions]), k=k + 1, candidates=candidates)
+        not_self = positions != query_positions[:, None]
+        # Keep the first k neighbours that are not the query track itself
+        keep = not_self & (np.cumsum(not_self, axis=1) <= k)
+        rows, columns = np.nonzero(keep)
+        neighbour_positions = positions[rows, columns]
+        found = neighbour_positions >= 0
+        rows, columns, neighbour_positions = rows[found], columns[found], neighbour_positions[found]
+
+        result = pd.DataFrame({
+            'query_track_id': np.asarray(track_ids, dtype=object)[rows],
+            'rank': np.cumsum(keep, axis=1)[rows, columns],
+            'track_id': np.asarray(self.track_ids)[neighbour_positions],
+            'distance': distances[rows, columns],
+            'grammy_nomination': np.asarray(self.nominated)[neighbour_positions],
+        })
+        return result
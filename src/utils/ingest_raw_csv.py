@@ -0,0 +1,263 @@
+"""
+Loads the raw CSV files of data/raw into the staging tables.
+
+The CSV is parsed with pinned column types taken from sql/schema_<table>.sql. With pyarrow, the file is split
+into row-aligned blocks parsed by a pool of threads (chunked pandas.read_csv is used when pyarrow is not
+installed). Each parsed batch is streamed to PostgreSQL with COPY, in file order, over a single connection and
+transaction, so the file is never held in memory as a whole and no INSERT seed file is written.
+
+Usage:
+    python src/utils/ingest_raw_csv.py data/raw/spotify_dataset.csv data/raw/the_grammy_awards.csv
+    python src/utils/ingest_raw_csv.py my_export.csv --table spotify_staging --append
+"""
+
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'sql')
+
+# Staging table of each raw file, when --table is not given
+DEFAULT_TABLES = {
+    'spotify_dataset.csv': 'spotify_staging',
+    'the_grammy_awards.csv': 'grammy_staging',
+}
+
+# Columns renamed by CreateSchemaSeed.infer_schema_postgres when the staging schemas were created
+RENAMED_COLUMNS = {'key': 'key_column', 'explicit': 'explicit_column'}
+
+def parse_staging_schema(schema_path):
+    """
+    Reads the table name and the column types of a CREATE TABLE script.
+
+    Args:
+    schema_path (str): Path of the script, e.g. sql/schema_spotify_staging.sql.
+
+    Returns:
+    tuple: (table name, list of (column name, PostgreSQL type) in table order).
+    """
+    with open(schema_path, 'r', encoding='utf-8') as file:
+        script = file.read()
+    match = re.search(r'CREATE TABLE\s+"([^"]+)"\s*\((.*)\)', script, re.DOTALL | re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"No CREATE TABLE statement found in {schema_path}")
+    columns = re.findall(r'"([^"]+)"\s+([A-Z]+)', match.group(2))
+    return match.group(1), [(name, postgres_type.upper()) for name, postgres_type in columns]
+
+def csv_column_names(csv_path):
+    """
+    Reads the header of a CSV file and maps it to staging column names: an empty header is named
+    'Unnamed: <position>' (as pandas does), and the renamed columns get their staging name.
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        header = next(csv.reader(file))
+    return [RENAMED_COLUMNS.get(name, name) if name else f'Unnamed: {position}' for position, name in enumerate(header)]
+
+def row_aligned_blocks(csv_path, block_size):
+    """
+    Reads a CSV file after its header as blocks of about `block_size` bytes, each ending on a row boundary.
+    A newline ends a row only outside quoted values, i.e. after an even number of '"' characters since the
+    start of the file. Escaped quotes are doubled, so they keep the parity; this assumes that quotes only
+    appear in quoted values, as in the files written by pandas or the csv module.
+
+    Args:
+    csv_path (str): Path of the CSV file.
+    block_size (int): Number of bytes read per block.
+
+    Yields:
+    bytes: Complete CSV rows, without header.
+    """
+    def row_end(data, parity):
+        """Returns the position after the last newline of `data` outside quoted values, or -1."""
+        position = len(data)
+        while True:
+            position = data.rfind(b'\n', 0, position)
+            if position < 0 or (parity + data.count(b'"', 0, position)) % 2 == 0:
+                return position + 1 if position >= 0 else -1
+
+    with open(csv_path, 'rb') as file:
+        pending = b''
+        parity = 0  # Quotes seen before `pending`, modulo 2
+        header_done = False
+        while True:
+            chunk = file.read(block_size)
+            data = pending + chunk
+            if not header_done:
+                # The header is the first row: find its first newline outside quoted values
+                position = data.find(b'\n')
+                while position >= 0 and data.count(b'"', 0, position) % 2:
+                    position = data.find(b'\n', position + 1)
+                if position < 0 and chunk:
+                    pending = data
+                    continue
+                data = data[position + 1:] if position >= 0 else b''
+                header_done = True
+            if not chunk:
+                if data:
+                    yield data
+                return
+            end = row_end(data, parity)
+            if end <= 0:
+                pending = data  # A single row longer than the block, keep reading
+                continue
+            yield data[:end]
+            parity = (parity + data.count(b'"', 0, end)) % 2
+            pending = data[end:]
+
+def arrow_batches(csv_path, column_names, column_types, block_size, workers=None):
+    """
+    Streams a CSV file as CSV-encoded batches ready for COPY. The file is split into row-aligned blocks
+    that a pool of threads parses and re-encodes with pyarrow, which releases the GIL, so several blocks
+    are converted in parallel; the batches are yielded in file order.
+
+    Args:
+    csv_path (str): Path of the CSV file.
+    column_names (list): Staging name of each CSV column.
+    column_types (dict): PostgreSQL type of each column.
+    block_size (int): Number of bytes parsed per batch.
+    workers (int): Number of parsing threads; by default the number of CPUs.
+
+    Yields:
+    io.BytesIO: CSV rows of one batch, without header.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    arrow_types = {'INTEGER': pa.int64(), 'FLOAT': pa.float64(), 'BOOLEAN': pa.bool_()}
+    read_options = pa_csv.ReadOptions(use_threads=False, column_names=column_names)  # One thread per block
+    parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+    convert_options = pa_csv.ConvertOptions(
+        column_types={name: arrow_types.get(column_types[name], pa.string()) for name in column_names},
+        strings_can_be_null=True  # Empty fields are NULL, as with pandas.read_csv
+    )
+    write_options = pa_csv.WriteOptions(include_header=False)
+
+    def convert(block):
+        table = pa_csv.read_csv(pa.BufferReader(block), read_options=read_options, parse_options=parse_options,
+                                convert_options=convert_options)
+        buffer = io.BytesIO()
+        pa_csv.write_csv(table, buffer, write_options=write_options)
+        buffer.seek(0)
+        return buffer
+
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # At most two blocks per thread are in flight, which bounds the memory used
+        pending = deque()
+        for block in row_aligned_blocks(csv_path, block_size):
+            pending.append(executor.submit(convert, block))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def pandas_batches(csv_path, column_names, column_types, chunk_rows):
+    """
+    Streams a CSV file as CSV-encoded batches ready for COPY, parsed by pandas.read_csv in chunks.
+
+    Args:
+    csv_path (str): Path of the CSV file.
+    column_names (list): Staging name of each CSV column.
+    column_types (dict): PostgreSQL type of each column.
+    chunk_rows (int): Number of rows parsed per batch.
+
+    Yields:
+    io.BytesIO: CSV rows of one batch, without header.
+    """
+    import pandas as pd
+    pandas_types = {'INTEGER': 'Int64', 'FLOAT': 'float64', 'BOOLEAN': 'boolean'}
+    chunks = pd.read_csv(csv_path, header=0, names=column_names, chunksize=chunk_rows,
+                         dtype={name: pandas_types.get(column_types[name], 'string') for name in column_names})
+    for chunk in chunks:
+        yield io.BytesIO(chunk.to_csv(header=False, index=False).encode('utf-8'))
+
+def ingest_csv(db_service, csv_path, table_name=None, schema_path=None, replace=True, engine='auto',
+               block_size=16 * 1024 * 1024, chunk_rows=100000, workers=None):
+    """
+    Loads a raw CSV file into its staging table with COPY, in a single transaction.
+
+    Args:
+    db_service (PostgreSQLConnection): Database service used for the COPY.
+    csv_path (str): Path of the CSV file.
+    table_name (str): Staging table; by default taken from DEFAULT_TABLES.
+    schema_path (str): CREATE TABLE script pinning the column types; by default sql/schema_<table>.sql.
+    replace (bool): Drop and recreate the table before loading (in the same transaction).
+    engine (str): 'pyarrow', 'pandas' or 'auto' (pyarrow when installed).
+    block_size (int): Bytes per batch with pyarrow.
+    chunk_rows (int): Rows per batch with pandas.
+    workers (int): Parsing threads with pyarrow; by default the number of CPUs.
+
+    Returns:
+    dict: Table, engine, rows, bytes read, duration and throughput of the load.
+    """
+    table_name = table_name or DEFAULT_TABLES.get(os.path.basename(csv_path))
+    if table_name is None:
+        raise ValueError(f"No staging table known for {csv_path}; pass --table.")
+    schema_path = schema_path or os.path.join(SQL_DIR, f'schema_{table_name}.sql')
+    schema_table, schema_columns = parse_staging_schema(schema_path)
+    column_types = dict(schema_columns)
+
+    column_names = csv_column_names(csv_path)
+    unknown = [name for name in column_names if name not in column_types]
+    if unknown:
+        raise ValueError(f"Columns of {csv_path} missing from {schema_path}: {unknown}")
+
+    if engine == 'auto':
+        try:
+            import pyarrow.csv  # Parser of the row-aligned blocks
+            engine = 'pyarrow'
+        except ImportError:
+            engine = 'pandas'
+    if engine == 'pyarrow':
+        batches = arrow_batches(csv_path, column_names, column_types, block_size, workers)
+    else:
+        batches = pandas_batches(csv_path, column_names, column_types, chunk_rows)
+
+    setup_query = None
+    if replace:
+        setup_query = db_service.open_query(os.path.join(SQL_DIR, 'queries', 'drop_table.sql'), table_name) + '\n' + db_service.open_query(schema_path)
+        if schema_table != table_name:
+            raise ValueError(f"{schema_path} creates {schema_table}, not {table_name}")
+
+    start = time.perf_counter()
+    rows = db_service.copy_batches(table_name, column_names, batches, setup_query=setup_query)
+    seconds = time.perf_counter() - start
+    file_bytes = os.path.getsize(csv_path)
+    return {
+        'table': table_name, 'engine': engine, 'rows': rows, 'bytes': file_bytes, 'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0,
+        'mb_per_second': file_bytes / 1024 / 1024 / seconds if seconds else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Load raw CSV files into the staging tables with COPY.')
+    parser.add_argument('csv_paths', nargs='+', help='Raw CSV files, e.g. data/raw/spotify_dataset.csv.')
+    parser.add_argument('--table', help='Staging table (only with a single CSV file); by default inferred from the file name.')
+    parser.add_argument('--schema', help='CREATE TABLE script pinning the column types; by default sql/schema_<table>.sql.')
+    parser.add_argument('--append', action='store_true', help='Append to the existing table instead of recreating it.')
+    parser.add_argument('--engine', choices=['auto', 'pyarrow', 'pandas'], default='auto', help='CSV parser.')
+    parser.add_argument('--block-size-mb', type=float, default=16, help='Megabytes parsed per batch with pyarrow.')
+    parser.add_argument('--chunk-rows', type=int, default=100000, help='Rows parsed per batch with pandas.')
+    parser.add_argument('--workers', type=int, help='Parsing threads with pyarrow; by default the number of CPUs.')
+    args = parser.parse_args()
+    if args.table and len(args.csv_paths) > 1:
+        parser.error('--table can only be used with a single CSV file.')
+
+    from connections.db import PostgreSQLConnection
+    db_service = PostgreSQLConnection()
+    for csv_path in args.csv_paths:
+        result = ingest_csv(db_service, csv_path, table_name=args.table, schema_path=args.schema, replace=not args.append,
+                            engine=args.engine, block_size=int(args.block_size_mb * 1024 * 1024), chunk_rows=args.chunk_rows,
+                            workers=args.workers)
+        print(f"✓ {result['rows']} rows loaded into {result['table']} from {csv_path} with {result['engine']} in {result['seconds']:.2f} s "
+              f"({result['rows_per_second']:.0f} rows/s, {result['mb_per_second']:.1f} MB/s)")
+
+if __name__ == '__main__':
+    main()